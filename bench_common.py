@@ -0,0 +1,57 @@
+# bench_common.py
+"""
+Latency summaries and baseline comparison shared by bench_xhtml.py and bench_format.py,
+so both benchmarks report and gate regressions the same way.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def percentile(sorted_samples: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(q / 100 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[rank]
+
+
+def summarize(samples: List[float], digits: int = 4, **amounts: float) -> Dict:
+    """
+    Count, total and p50/p90/p99/max seconds of a list of samples; every keyword
+    amount (e.g. files=12, mb=3.5) adds "<name>_per_sec" over the total time.
+    """
+    s = sorted(samples)
+    total = sum(s)
+    out = {
+        "count": len(s),
+        "total_s": round(total, 4),
+        "p50_s": round(percentile(s, 50), digits),
+        "p90_s": round(percentile(s, 90), digits),
+        "p99_s": round(percentile(s, 99), digits),
+        "max_s": round(s[-1], digits) if s else 0.0,
+    }
+    for name, amount in amounts.items():
+        out[f"{name}_per_sec"] = round(amount / total, 2) if total else 0.0
+    return out
+
+
+def compare_rows(rows: Iterable[Tuple[str, float, float, bool]], max_slowdown: Optional[float],
+                 header: str = "metric") -> bool:
+    """
+    Print (label, current, baseline, gated) rows with their current/baseline ratio (>1 is
+    slower). Returns False if a gated row regressed past max_slowdown.
+    """
+    rows = list(rows)
+    width = max([len(header), *(len(row[0]) for row in rows)]) + 2
+    ok = True
+    print(f"{header:<{width}}{'current':>10}{'baseline':>10}{'ratio':>8}", file=sys.stderr)
+    for label, cur, base, gated in rows:
+        ratio = cur / base if base else float("inf")
+        flag = ""
+        if gated and max_slowdown and ratio > max_slowdown:
+            ok, flag = False, "  REGRESSION"
+        print(f"{label:<{width}}{cur:>10.4f}{base:>10.4f}{ratio:>8.2f}{flag}", file=sys.stderr)
+    return ok
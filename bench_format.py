@@ -0,0 +1,322 @@
+# bench_format.py
+"""
+Benchmark the answer formatters (formatting.py) and normalizers (check.py) on a generated
+corpus that includes pathological inputs, so that formatter changes come with numbers and
+regressions in the regex paths are caught.
+
+Usage:
+  python bench_format.py \
+      --answers 200 --long-doc-lines 100000 --long-line-kb 512 \
+      --repeat 3                      # optional: best of N per document
+      --only format_text1 --only fast # optional, repeatable: functions whose name contains this
+      --out bench_format.json         # optional: write the report here (default: stdout)
+      --compare previous.json         # optional: print ratios against an earlier report
+      --max-slowdown 1.25             # optional: exit 1 if a function/category regressed beyond this
+
+Corpus (deterministic for a --seed):
+  - legal: realistic answers with headings, numbered items, bullets, clauses, a leading
+    "Plaintext", the "\\n.\\n -" artifact and spacing glitches around punctuation
+  - long_doc: one document of --long-doc-lines lines
+  - deep_clauses: clause numbering down to 1.1.a.iv, with indented a. / iv. sub-clauses
+  - long_line: single lines of --long-line-kb: prose, a run of punctuation / dashes, and
+    a clause number followed by a run of spaces
+  - bullets: heavy, deeply indented bullet lists (" - ", "- ", tabs, dashes without a space)
+
+Report (JSON):
+  - meta: corpus sizes (docs / MB / lines per category), python version, seed
+  - functions: per function and category, total seconds, MB/s and per-document latency
+    (p50 / p99 / max); "all" adds the worst document
+  - variants: time ratios of formatters that should give the same output (<1 is faster)
+  - mismatches: documents where format_text_fast / format_stream differ from format_text1,
+    or the "clean" profile from clean_formatting + the default profile (exit 1 if any)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import re
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bench_common import compare_rows, summarize
+from check import PROFILES, clean_formatting, normalize_legal_text
+from formatting import StreamFormatter, format_text, format_text1, format_text_fast
+
+WORDS = (
+    "the claimant defendant court tribunal agreement contract clause party parties notice "
+    "breach damages liability obligation termination consideration evidence witness appeal "
+    "judgment order costs hearing application statute section schedule provision reasonable "
+    "time good faith performance remedy injunction indemnity warranty representation"
+).split()
+HEADINGS = ["Summary", "Key Issues", "Analysis", "Relevant Law", "Conclusion", "Next Steps"]
+# Sentence endings, with the spacing glitches seen in model output around punctuation
+ENDINGS = [".", ".", ".", ". ", ", ", ". .", ". -", ".\t"]
+ROMANS = ["i", "ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"]
+
+
+# -------- Synthetic corpus --------
+
+def sentence(rng: random.Random, words: int = 0) -> str:
+    words = words or rng.randint(6, 24)
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + rng.choice(ENDINGS)
+
+
+def legal_answer(rng: random.Random) -> str:
+    lines = []
+    if rng.random() < 0.2:
+        lines += ["Plaintext", ""]
+    for heading in rng.sample(HEADINGS, rng.randint(2, 4)):
+        lines += [heading, ""]
+        for n in range(1, rng.randint(2, 7)):
+            lines.append(f"{n}. {sentence(rng)}")
+            for _ in range(rng.randint(0, 3)):
+                lines.append(f"   - {sentence(rng)}")
+            if rng.random() < 0.3:
+                lines.append(f"   {sentence(rng)}")
+            if rng.random() < 0.2:
+                lines += [".", f"  - {sentence(rng)}"]
+            if rng.random() < 0.3:
+                lines.append("")
+        lines.append(" ".join(sentence(rng) for _ in range(rng.randint(2, 6))))
+        for m in range(1, rng.randint(1, 4)):
+            lines.append(f"{n}.{m} {sentence(rng)}")
+            if rng.random() < 0.5:
+                lines.append(f"  {rng.choice('abc')}. {sentence(rng)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def deep_clauses(rng: random.Random, sections: int) -> str:
+    lines = []
+    for n in range(1, sections + 1):
+        lines.append(f"{n}. {sentence(rng, 4)}")
+        for m in range(1, rng.randint(2, 5)):
+            lines.append(f"{n}.{m} {sentence(rng)}")
+            for letter in "abcd"[:rng.randint(1, 4)]:
+                lines.append(f"  {letter}. {sentence(rng)}")
+                lines.append(f"{n}.{m}.{letter} {sentence(rng)}")
+                for roman in ROMANS[:rng.randint(1, 5)]:
+                    lines.append(f"    {roman}. {sentence(rng)}")
+                    lines.append(f"{n}.{m}.{letter}.{roman} {sentence(rng)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def long_lines(rng: random.Random, size: int) -> List[str]:
+    prose = []
+    length = 0
+    while length < size:
+        prose.append(sentence(rng))
+        length += len(prose[-1]) + 1
+    units = [". ", ", ", " - ", ". . ", ".  -", ",\t", "- "]
+    punct = "".join(rng.choice(units) for _ in range(size // 3))[:size]
+    return [" ".join(prose)[:size], punct, "1.1" + " " * size + "x"]
+
+
+def bullets(rng: random.Random, count: int) -> str:
+    lines = []
+    for _ in range(count):
+        indent = " " * rng.randint(0, 12)
+        style = rng.random()
+        if style < 0.5:
+            lines.append(f"{indent} - {sentence(rng, 6)}")
+        elif style < 0.8:
+            lines.append(f"{indent}- {sentence(rng, 6)}")
+        elif style < 0.9:
+            lines.append(f"\t{indent}- {sentence(rng, 6)}")
+        else:
+            lines.append(f"{indent}-{sentence(rng, 6)}")
+        if rng.random() < 0.1:
+            lines.append(f"{indent}   {sentence(rng, 6)}")
+        if rng.random() < 0.05:
+            lines.append("")
+    return "\n".join(lines)
+
+
+def make_corpus(args: argparse.Namespace) -> Dict[str, List[str]]:
+    rng = random.Random(args.seed)
+    long_doc: List[str] = []
+    lines = 0
+    while lines < args.long_doc_lines:
+        answer = legal_answer(rng)
+        long_doc.append(answer)
+        lines += answer.count("\n") + 1
+    return {
+        "legal": [legal_answer(rng) for _ in range(args.answers)],
+        "long_doc": ["\n".join(long_doc)],
+        "deep_clauses": [deep_clauses(rng, 20) for _ in range(max(1, args.answers // 20))],
+        "long_line": long_lines(rng, args.long_line_kb * 1024),
+        "bullets": [bullets(rng, 2000) for _ in range(max(1, args.answers // 20))],
+    }
+
+
+# -------- Functions --------
+
+_TOKEN = re.compile(r"\S+\s*|\s+")
+
+
+def _tokens(text: str) -> List[str]:
+    """Model-output-like chunks: a word and the whitespace after it."""
+    return _TOKEN.findall(text)
+
+
+def _run_stream(tokens: List[str]) -> str:
+    formatter = StreamFormatter()
+    return "".join(formatter.feed(t) for t in tokens) + formatter.close()
+
+
+# (name, untimed preparation of the document or None, timed call)
+FUNCTIONS: List[Tuple[str, Optional[Callable], Callable[..., str]]] = [
+    ("format_text", None, format_text),
+    ("format_text1", None, format_text1),
+    ("format_text_fast", None, format_text_fast),
+    ("format_stream", _tokens, _run_stream),
+    ("clean_formatting", None, clean_formatting),
+] + [(f"normalize:{name}", None, partial(normalize_legal_text, profile=name)) for name in PROFILES]
+
+# Functions that give the same output, compared as time(candidate) / time(sum of baselines)
+VARIANTS = [
+    ("format_text_fast", ["format_text1"]),
+    ("format_stream", ["format_text1"]),
+    ("format_text1", ["format_text"]),
+    ("normalize:clean", ["clean_formatting", "normalize:default"]),
+]
+
+
+# -------- Measurement --------
+
+def _mb(docs: List[str]) -> float:
+    return sum(len(d.encode("utf-8")) for d in docs) / (1024 * 1024)
+
+
+def bench(corpus: Dict[str, List[str]], functions, repeat: int) -> Tuple[Dict, Dict[str, Dict[str, List[str]]]]:
+    """Best-of-repeat seconds per function and document; also returns every function's outputs."""
+    report: Dict = {}
+    outputs: Dict[str, Dict[str, List[str]]] = {}
+    for name, prepare, fn in functions:
+        report[name] = {}
+        outputs[name] = {}
+        worst = (0.0, "")
+        all_samples: List[float] = []
+        for category, docs in corpus.items():
+            samples = []
+            outputs[name][category] = []
+            for i, doc in enumerate(docs):
+                arg = prepare(doc) if prepare else doc
+                best = float("inf")
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    result = fn(arg)
+                    best = min(best, time.perf_counter() - t0)
+                outputs[name][category].append(result)
+                samples.append(best)
+                worst = max(worst, (best, f"{category}[{i}]"))
+            report[name][category] = summarize(samples, 5, mb=_mb(docs))
+            all_samples += samples
+        size = sum(_mb(docs) for docs in corpus.values())
+        report[name]["all"] = dict(summarize(all_samples, 5, mb=size), worst=worst[1])
+        print(f"{name:<26}{report[name]['all']['mb_per_sec']:>9.2f} MB/s"
+              f"  worst {worst[0]:.4f}s ({worst[1]})", file=sys.stderr)
+    return report, outputs
+
+
+def variants(report: Dict) -> Dict[str, float]:
+    ratios = {}
+    for candidate, baselines in VARIANTS:
+        if candidate in report and all(b in report for b in baselines):
+            base = sum(report[b]["all"]["total_s"] for b in baselines)
+            ratios[f"{candidate} / {' + '.join(baselines)}"] = (
+                round(report[candidate]["all"]["total_s"] / base, 3) if base else 0.0)
+    return ratios
+
+
+def mismatches(corpus: Dict[str, List[str]], outputs: Dict[str, Dict[str, List[str]]]) -> List[str]:
+    """Documents where formatters meant to agree don't."""
+    found = []
+    for category, docs in corpus.items():
+        for i, doc in enumerate(docs):
+            if "format_text1" in outputs:
+                want = outputs["format_text1"][category][i]
+                found += [f"{name} {category}[{i}]" for name in ("format_text_fast", "format_stream")
+                          if name in outputs and outputs[name][category][i] != want]
+            if "normalize:clean" in outputs:
+                want = normalize_legal_text(clean_formatting(doc))
+                if outputs["normalize:clean"][category][i] != want:
+                    found.append(f"normalize:clean {category}[{i}]")
+    return found
+
+
+def compare(report: Dict, baseline: Dict, max_slowdown: Optional[float]) -> bool:
+    """Print current/baseline ratios (>1 is slower). Returns False if a function regressed past max_slowdown."""
+    rows = []
+    for name, categories in report["functions"].items():
+        for category, stats in categories.items():
+            base = baseline.get("functions", {}).get(name, {}).get(category)
+            if base and base.get("total_s"):
+                rows.append((f"{name} / {category}", stats["total_s"], base["total_s"], True))
+    return compare_rows(rows, max_slowdown, header="function / category")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the answer formatters on a generated corpus.")
+    parser.add_argument("--answers", type=int, default=200, help="Realistic legal answers (other categories scale with it)")
+    parser.add_argument("--long-doc-lines", type=int, default=100000)
+    parser.add_argument("--long-line-kb", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per document; the best one counts")
+    parser.add_argument("--only", action="append", default=None,
+                        help="Benchmark only functions whose name contains this (repeatable)")
+    parser.add_argument("--out", type=Path, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON report to compare against")
+    parser.add_argument("--max-slowdown", type=float,
+                        help="With --compare: exit 1 if any function/category is slower than baseline by this factor")
+    args = parser.parse_args()
+
+    functions = [f for f in FUNCTIONS if not args.only or any(o in f[0] for o in args.only)]
+    t0 = time.perf_counter()
+    corpus = make_corpus(args)
+    results, outputs = bench(corpus, functions, max(1, args.repeat))
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "seed": args.seed,
+            "repeat": max(1, args.repeat),
+            "corpus": {
+                category: {
+                    "docs": len(docs),
+                    "mb": round(_mb(docs), 2),
+                    "lines": sum(d.count("\n") + 1 for d in docs),
+                }
+                for category, docs in corpus.items()
+            },
+            "seconds": round(time.perf_counter() - t0, 2),
+        },
+        "functions": results,
+        "variants": variants(results),
+        "mismatches": mismatches(corpus, outputs),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    ok = not report["mismatches"]
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        ok = compare(report, baseline, args.max_slowdown) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
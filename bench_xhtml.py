@@ -0,0 +1,365 @@
+# bench_xhtml.py
+"""
+Benchmark the case conversion pipeline in xhtml.py on a synthetic corpus, so that
+throughput can be tracked and regressions caught when pdf2docx / mammoth change.
+
+Dependencies (xhtml.py's, plus python-docx to build the DOCX corpus):
+  pip install pandas pdf2docx mammoth lxml openpyxl tqdm python-docx
+
+Usage:
+  python bench_xhtml.py \
+      --cases 4 --pdfs-per-case 2 --docx-per-case 1 \
+      --pages 5 --tables-per-page 1 --images-per-page 1 \
+      --out bench.json                # optional: write the report here (default: stdout)
+      --compare previous.json         # optional: print ratios against an earlier report
+      --max-slowdown 1.25             # optional: exit 1 if a stage p50 regressed beyond this
+      -- --workers 4 --fast-path      # optional: extra arguments for the end-to-end xhtml.py run
+
+Report (JSON):
+  - meta: corpus parameters, python / pdf2docx / mammoth / PyMuPDF versions
+  - end_to_end: xhtml.py run as a subprocess; seconds, files/sec, pages/sec, peak RSS
+  - stages: pdf_to_docx, docx_to_xhtml, copy, manifest run in-process, each with
+    count, total seconds, p50/p90/p99/max seconds per call and peak RSS after the stage
+  - stages docx_to_xhtml[<writer>]: the XHTML writers (tree / stream / native engine, pretty / compact)
+    on the largest DOCX files, with the peak RSS of a single conversion and output size
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import docx
+import pandas as pd
+
+import xhtml
+from bench_common import compare_rows, summarize
+from xhtml import fitz
+
+
+LOREM = (
+    "The parties agree that the obligations set out in this agreement shall be performed "
+    "in good faith and within a reasonable time, subject to the conditions stated herein. "
+)
+
+
+# -------- Synthetic corpus --------
+
+def _png(rng: random.Random, width: int = 320, height: int = 200) -> bytes:
+    """A noisy RGB image, so that PNG compression cannot make it trivially small."""
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    pix.set_rect(pix.irect, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    for _ in range(width * height // 20):
+        pix.set_pixel(rng.randrange(width), rng.randrange(height),
+                      (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    return pix.tobytes("png")
+
+
+def make_pdf(path: Path, pages: int, tables: int, images: int, rng: random.Random) -> None:
+    """A text-layer PDF with ruled tables and embedded images on every page."""
+    doc = fitz.open()
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"Page {n + 1}", fontsize=14)
+        y = 80
+        page.insert_textbox(fitz.Rect(72, y, 540, y + 120), LOREM * 4, fontsize=10)
+        y += 130
+        for _ in range(tables):
+            rows, cols, cell_w, cell_h = 4, 3, 150, 18
+            for r in range(rows):
+                for c in range(cols):
+                    cell = fitz.Rect(72 + c * cell_w, y + r * cell_h, 72 + (c + 1) * cell_w, y + (r + 1) * cell_h)
+                    page.draw_rect(cell, color=(0, 0, 0), width=0.5)
+                    page.insert_text((cell.x0 + 4, cell.y1 - 5), f"R{r}C{c} {rng.randrange(1000)}", fontsize=9)
+            y += rows * cell_h + 12
+        for _ in range(images):
+            if y > 640:
+                break
+            page.insert_image(fitz.Rect(72, y, 232, y + 100), stream=_png(rng))
+            y += 110
+    doc.save(str(path))
+    doc.close()
+
+
+def make_docx(path: Path, pages: int, tables: int, images: int, rng: random.Random) -> None:
+    """A DOCX with the same per-page content, pages separated by page breaks."""
+    d = docx.Document()
+    for n in range(pages):
+        d.add_heading(f"Page {n + 1}", level=2)
+        d.add_paragraph(LOREM * 4)
+        for _ in range(tables):
+            table = d.add_table(rows=4, cols=3)
+            for r, row in enumerate(table.rows):
+                for c, cell in enumerate(row.cells):
+                    cell.text = f"R{r}C{c} {rng.randrange(1000)}"
+        for _ in range(images):
+            d.add_picture(io.BytesIO(_png(rng)))
+        if n < pages - 1:
+            d.add_page_break()
+    d.save(str(path))
+
+
+def make_corpus(root: Path, args: argparse.Namespace) -> Dict:
+    """
+    Build root/input/<case>/ folders and root/cases.xlsx. Returns the corpus
+    description recorded in the report (counts of files and pages).
+    """
+    rng = random.Random(args.seed)
+    input_dir = root / "input"
+    rows = []
+    pdfs = docxs = 0
+    for i in range(args.cases):
+        case_name = f"Bench Case {i:04d}"
+        case_dir = input_dir / case_name
+        case_dir.mkdir(parents=True, exist_ok=True)
+        for j in range(args.pdfs_per_case):
+            make_pdf(case_dir / f"exhibit {j}.pdf", args.pages, args.tables_per_page, args.images_per_page, rng)
+            pdfs += 1
+        for j in range(args.docx_per_case):
+            make_docx(case_dir / f"brief {j}.docx", args.pages, args.tables_per_page, args.images_per_page, rng)
+            docxs += 1
+        rows.append({"QID": 1000 + i, "Name of Case": case_name})
+    pd.DataFrame(rows).to_excel(root / "cases.xlsx", sheet_name="Sheet1", index=False)
+    return {
+        "cases": args.cases,
+        "pdfs": pdfs,
+        "docx": docxs,
+        "pages_per_file": args.pages,
+        "tables_per_page": args.tables_per_page,
+        "images_per_page": args.images_per_page,
+        "seed": args.seed,
+    }
+
+
+# -------- Measurement --------
+
+def peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def timed(fn: Callable[[], object]) -> float:
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    # Converters report failure instead of raising; a failed call is not a valid sample
+    if isinstance(result, tuple) and result and result[0] is False:
+        raise RuntimeError(result[1])
+    return elapsed
+
+
+# -------- Benchmarks --------
+
+def bench_end_to_end(root: Path, corpus: Dict, extra_args: List[str]) -> Dict:
+    """Run xhtml.py as a subprocess over the whole corpus (fresh output dir, so a cold cache)."""
+    out_dir = root / "e2e_out"
+    cmd = [
+        sys.executable, str(Path(xhtml.__file__).resolve()),
+        "--excel", str(root / "cases.xlsx"),
+        "--input-dir", str(root / "input"),
+        "--output-dir", str(out_dir),
+        "--sheet-name", "Sheet1",
+        *extra_args,
+    ]
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    seconds = time.perf_counter() - t0
+    if proc.returncode != 0:
+        raise RuntimeError(f"xhtml.py failed ({proc.returncode}):\n{proc.stderr[-2000:]}")
+    with open(out_dir / "manifest.csv", newline="", encoding="utf-8") as f:
+        errors = sum(1 for row in csv.DictReader(f) if row["status"] != "ok")
+    files = corpus["pdfs"] + corpus["docx"]
+    pages = files * corpus["pages_per_file"]
+    return {
+        "args": extra_args,
+        "seconds": round(seconds, 3),
+        "files": files,
+        "pages": pages,
+        "files_per_sec": round(files / seconds, 2),
+        "pages_per_sec": round(pages / seconds, 2),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "manifest_errors": errors,
+    }
+
+
+def bench_stages(root: Path, corpus: Dict, repeat: int) -> Dict:
+    """
+    Time each pipeline stage in-process, one sample per file (per repeat):
+    pdf_to_docx, docx_to_xhtml (source and generated DOCX), copy (place_file),
+    and manifest (compacting the end-to-end run's manifest.jsonl into CSV).
+    """
+    work = root / "stages"
+    pdfs = sorted((root / "input").rglob("*.pdf"))
+    source_docx = sorted((root / "input").rglob("*.docx"))
+    pages = corpus["pages_per_file"]
+    stages: Dict[str, Dict] = {}
+
+    samples: List[float] = []
+    generated: List[Path] = []
+    for r in range(repeat):
+        for i, pdf in enumerate(pdfs):
+            out = work / "docx" / f"{i}.docx"
+            samples.append(timed(lambda: xhtml.pdf_to_docx(pdf, out)))
+            if r == 0:
+                generated.append(out)
+    stages["pdf_to_docx"] = dict(summarize(samples, files=len(samples), pages=pages * len(samples)),
+                                 peak_rss_mb=peak_rss_mb())
+
+    samples = []
+    for r in range(repeat):
+        for i, src in enumerate([*source_docx, *generated]):
+            out = work / "xhtml" / f"{i}.xhtml"
+            samples.append(timed(lambda: xhtml.docx_to_xhtml(src, out)))
+    stages["docx_to_xhtml"] = dict(summarize(samples, files=len(samples), pages=pages * len(samples)),
+                                   peak_rss_mb=peak_rss_mb())
+
+    samples = []
+    outputs = [*generated, *sorted((work / "xhtml").glob("*.xhtml"))]
+    for r in range(repeat):
+        for i, src in enumerate(outputs):
+            dst = work / "copy" / f"{i}{src.suffix}"
+            samples.append(timed(lambda: xhtml.place_file(src, dst)))
+    stages["copy"] = dict(summarize(samples, files=len(samples)), peak_rss_mb=peak_rss_mb())
+
+    samples = []
+    log = root / "e2e_out" / "manifest.jsonl"
+    if log.exists():
+        case_order = {}
+        for row in xhtml.iter_manifest_log(log):
+            case_order.setdefault((row.get("qid", ""), row.get("case_name", "")), len(case_order))
+        out_dir = work / "manifest"
+        xhtml.ensure_dir(out_dir)
+        for r in range(repeat):
+            samples.append(timed(lambda: xhtml.write_manifest(xhtml.compact_manifest(log, case_order), out_dir)))
+    stages["manifest"] = dict(summarize(samples, files=len(samples)), peak_rss_mb=peak_rss_mb())
+    return stages
+
+
+# (engine, writer, compact); the native engine always streams, writer is ignored
+WRITERS = (
+    ("mammoth", "tree", False), ("mammoth", "tree", True), ("mammoth", "stream", False), ("mammoth", "stream", True),
+    ("native", "stream", False), ("native", "stream", True),
+)
+
+
+def bench_writers(root: Path, corpus: Dict, repeat: int, top: int) -> Dict:
+    """
+    Time docx_to_xhtml with each DOCX engine / XHTML writer on the `top` largest DOCX files
+    (sources and those generated by bench_stages). peak_rss_mb is the highest
+    per-conversion VmHWM (reset before each call; Linux), not the process peak.
+    """
+    work = root / "writers"
+    docs = [*(root / "input").rglob("*.docx"), *(root / "stages" / "docx").glob("*.docx")]
+    docs = sorted(docs, key=lambda p: p.stat().st_size, reverse=True)[:top]
+    stages: Dict[str, Dict] = {}
+    for engine, writer, compact in WRITERS:
+        name = f"docx_to_xhtml[{engine if engine != 'mammoth' else writer}{',compact' if compact else ''}]"
+        samples: List[float] = []
+        peak = 0.0
+        out_bytes = 0
+        for r in range(repeat):
+            for i, src in enumerate(docs):
+                out = work / name / f"{i}.xhtml"
+                xhtml._reset_peak_rss()
+                samples.append(timed(lambda: xhtml.docx_to_xhtml(src, out, writer=writer, compact=compact, engine=engine)))
+                peak = max(peak, xhtml._peak_rss_mb())
+                if r == 0:
+                    out_bytes += out.stat().st_size
+        stages[name] = dict(
+            summarize(samples, files=len(samples), pages=corpus["pages_per_file"] * len(samples)),
+            peak_rss_mb=round(peak, 1),
+            out_bytes=out_bytes,
+        )
+    return stages
+
+
+def _versions() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "pdf2docx": xhtml._package_version("pdf2docx"),
+        "mammoth": xhtml._package_version("mammoth"),
+        "pymupdf": xhtml._package_version("pymupdf"),
+        "lxml": xhtml._package_version("lxml"),
+    }
+
+
+def compare(report: Dict, baseline: Dict, max_slowdown: Optional[float]) -> bool:
+    """Print current/baseline ratios (>1 is slower). Returns False if a stage regressed past max_slowdown."""
+    rows = []
+    if "end_to_end" in report and "end_to_end" in baseline:
+        rows.append(("end_to_end", report["end_to_end"]["seconds"], baseline["end_to_end"]["seconds"], False))
+    for name, stage in report.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(name)
+        if base and base.get("p50_s"):
+            rows.append((f"{name} p50", stage["p50_s"], base["p50_s"], True))
+    return compare_rows(rows, max_slowdown)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark xhtml.py on a synthetic corpus.")
+    parser.add_argument("--work-dir", type=Path, help="Where to build the corpus (default: a temp dir, removed after)")
+    parser.add_argument("--cases", type=int, default=4)
+    parser.add_argument("--pdfs-per-case", type=int, default=2)
+    parser.add_argument("--docx-per-case", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=5, help="Pages per generated PDF/DOCX")
+    parser.add_argument("--tables-per-page", type=int, default=1)
+    parser.add_argument("--images-per-page", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the corpus for per-stage timings")
+    parser.add_argument("--writers-top", type=int, default=3,
+                        help="Benchmark the XHTML writers on this many of the largest DOCX files (0 = skip)")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only run the per-stage benchmarks")
+    parser.add_argument("--out", type=Path, help="Write the JSON report here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="Earlier JSON report to compare against")
+    parser.add_argument("--max-slowdown", type=float,
+                        help="With --compare: exit 1 if any stage p50 is slower than baseline by this factor")
+    parser.add_argument("xhtml_args", nargs=argparse.REMAINDER,
+                        help="After --: extra arguments for the end-to-end xhtml.py run")
+    args = parser.parse_args()
+    extra = [a for a in args.xhtml_args if a != "--"]
+
+    with tempfile.TemporaryDirectory(prefix="bench_xhtml_") as tmp:
+        root = args.work_dir or Path(tmp)
+        root.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        corpus = make_corpus(root, args)
+        report: Dict = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "corpus": corpus,
+                "corpus_build_s": round(time.perf_counter() - t0, 3),
+                "versions": _versions(),
+            }
+        }
+        if not args.skip_e2e:
+            report["end_to_end"] = bench_end_to_end(root, corpus, extra)
+        report["stages"] = bench_stages(root, corpus, max(1, args.repeat))
+        if args.writers_top > 0:
+            report["stages"].update(bench_writers(root, corpus, max(1, args.repeat), args.writers_top))
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if not compare(report, baseline, args.max_slowdown):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
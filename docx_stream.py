@@ -0,0 +1,652 @@
+# docx_stream.py
+"""
+Streaming DOCX -> XHTML block converter, an alternative to mammoth for large
+Word files.
+
+word/document.xml is read straight out of the zip with lxml's iterparse.
+Each top-level paragraph or table is converted when its end tag arrives and
+then cleared, so memory is bounded by the largest single block (a table, or
+a run of list paragraphs), not by the document. iter_blocks yields the
+XHTML elements that go under the body wrapper, in document order.
+
+The mapping follows mammoth's default style map, so the output is the same
+as docx_to_xhtml's mammoth path for the content we see in practice:
+  - paragraphs -> <p>; "Heading 1".."Heading 6" (by style id or name) -> <h1>..<h6>
+  - numbered / bulleted paragraphs (levels 1-5) -> nested <ol> / <ul> with <li>
+  - runs: bold <strong>, italic <em>, superscript <sup>, subscript <sub>,
+    strikethrough <s>, character style "Strong" <strong>; adjacent runs with the
+    same formatting share one element
+  - tabs, line breaks (<br/>), hyperlinks (w:hyperlink and HYPERLINK fields),
+    bookmarks (<a id>), tracked insertions (deletions are dropped)
+  - tables -> <table> with <thead>/<tbody> for header rows, colspan / rowspan
+  - images (DrawingML and VML imagedata) -> <img>, via an image handler
+Empty paragraphs are dropped, as mammoth does.
+
+Content that mammoth renders but this converter does not (footnotes,
+endnotes, comments, text boxes, w:pict shapes, symbol characters, checkboxes,
+linked images, strict OOXML) raises UnsupportedDocx; callers fall back to
+mammoth for those documents.
+"""
+
+from __future__ import annotations
+
+import base64
+import copy
+import io
+import re
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from lxml import etree
+
+# Bump whenever the output for a given DOCX changes (part of xhtml.py's cache key)
+CONVERTER_VERSION = "1"
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+PIC_NS = "http://schemas.openxmlformats.org/drawingml/2006/picture"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+V_NS = "urn:schemas-microsoft-com:vml"
+O_NS = "urn:schemas-microsoft-com:office:office"
+W14_NS = "http://schemas.microsoft.com/office/word/2010/wordml"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+
+
+def _w(name: str) -> str:
+    return f"{{{W_NS}}}{name}"
+
+
+W_P, W_TBL, W_TR, W_TC, W_R = _w("p"), _w("tbl"), _w("tr"), _w("tc"), _w("r")
+W_BOOKMARK_START = _w("bookmarkStart")
+W_VAL = _w("val")
+MC_CHOICE, MC_FALLBACK = f"{{{MC_NS}}}Choice", f"{{{MC_NS}}}Fallback"
+R_ID, R_EMBED = f"{{{R_NS}}}id", f"{{{R_NS}}}embed"
+
+# Elements whose children are read as if they were in the parent (as mammoth does)
+_TRANSPARENT = frozenset(map(_w, (
+    "ins", "smartTag", "customXml", "moveTo", "moveFromRangeStart", "moveFromRangeEnd",
+    "moveToRangeStart", "moveToRangeEnd", "object", "drawing",
+))) | frozenset(f"{{{V_NS}}}{t}" for t in ("group", "rect", "roundrect", "shape", "textbox"))
+# Content mammoth converts that we do not: the caller falls back to mammoth
+_UNSUPPORTED = {
+    _w("footnoteReference"): "footnotes",
+    _w("endnoteReference"): "endnotes",
+    _w("commentReference"): "comments",
+    _w("txbxContent"): "text boxes",
+    _w("pict"): "w:pict shapes",
+    _w("sym"): "symbol characters",
+    W_P: "nested paragraphs",
+    W_TBL: "tables inside paragraphs",
+}
+# Paragraph styles the default style map keeps as <p> even when numbered
+_NOTE_STYLE_NAMES = frozenset({"FOOTNOTE TEXT", "ENDNOTE TEXT", "ANNOTATION TEXT", "FOOTNOTE", "ENDNOTE"})
+_HEADING_ID = re.compile(r"Heading([1-6])")
+_HEADING_NAME = re.compile(r"HEADING ([1-6])")
+_FIELD_HYPERLINK = re.compile(r'^\s*HYPERLINK\s+(\\l\s+)?(?:"(.*)"|([^\\]\S*))')
+_IMAGE_TYPES = {"png": "png", "gif": "gif", "jpeg": "jpeg", "jpg": "jpeg", "tif": "tiff", "tiff": "tiff", "bmp": "bmp"}
+# Deepest list level the default style map nests (deeper ones stay paragraphs)
+MAX_LIST_LEVEL = 5
+
+# (image bytes, content type) -> <img> attributes other than alt, e.g. {"src": ...}
+ImageHandler = Callable[[bytes, Optional[str]], Dict[str, str]]
+# (tag, attributes) of the inline elements a piece of content is wrapped in, outermost first
+Chain = Tuple[Tuple[str, Dict[str, str]], ...]
+
+
+class UnsupportedDocx(ValueError):
+    """The document has content this converter does not handle; convert it with mammoth instead."""
+
+
+def data_uri_image(data: bytes, content_type: Optional[str]) -> Dict[str, str]:
+    """Inline an image as a base64 data URI (mammoth's default)."""
+    return {"src": f"data:{content_type};base64,{base64.b64encode(data).decode('ascii')}"}
+
+
+def _on(el) -> bool:
+    """A boolean property element (w:b, w:i, ...) is on unless w:val says otherwise."""
+    return el is not None and el.get(W_VAL) not in ("false", "0")
+
+
+def _append(parent, chain: Chain, item) -> None:
+    """
+    Append item (text or element) to parent inside the chain of inline
+    elements, reusing the last element at each level when it is the same
+    element with nothing after it (mammoth's collapsing of adjacent runs).
+    """
+    for tag, attrs in chain:
+        last = parent[-1] if len(parent) else None
+        if last is not None and last.tag == tag and not last.tail and dict(last.attrib) == attrs:
+            parent = last
+        else:
+            parent = etree.SubElement(parent, tag, attrs)
+    if not isinstance(item, str):
+        parent.append(item)
+    elif len(parent):
+        parent[-1].tail = (parent[-1].tail or "") + item
+    else:
+        parent.text = (parent.text or "") + item
+
+
+def _is_empty(el) -> bool:
+    return not el.text and not len(el)
+
+
+class _Package:
+    """The small parts of a DOCX read up front: relationships, content types, styles, numbering."""
+
+    def __init__(self, z: zipfile.ZipFile):
+        self.zip = z
+        self.document = "word/document.xml"
+        for rel in self._rels("_rels/.rels").values():
+            if rel[2] == OFFICE_DOCUMENT_REL:
+                self.document = rel[0].lstrip("/")
+        folder, _, name = self.document.rpartition("/")
+        self.rels = self._rels(f"{folder}/_rels/{name}.rels")
+
+        self.content_types: Dict[str, str] = {}
+        self.default_types: Dict[str, str] = {}
+        types = self._xml("[Content_Types].xml")
+        if types is not None:
+            for el in types.iter(f"{{{CT_NS}}}Default"):
+                self.default_types[el.get("Extension")] = el.get("ContentType")
+            for el in types.iter(f"{{{CT_NS}}}Override"):
+                self.content_types[el.get("PartName").lstrip("/")] = el.get("ContentType")
+
+        # style id -> name for paragraph / character styles; numbering style id -> numId
+        self.paragraph_styles: Dict[str, str] = {}
+        self.character_styles: Dict[str, str] = {}
+        self.numbering_styles: Dict[str, Optional[str]] = {}
+        styles = self._xml("word/styles.xml")
+        if styles is not None:
+            for style in styles.iter(_w("style")):
+                kind, style_id = style.get(_w("type")), style.get(_w("styleId"))
+                name_el = style.find(_w("name"))
+                name = name_el.get(W_VAL) if name_el is not None else None
+                if kind == "paragraph":
+                    self.paragraph_styles[style_id] = name
+                elif kind == "character":
+                    self.character_styles[style_id] = name
+                elif kind == "numbering":
+                    num_id = style.find(f"{_w('pPr')}/{_w('numPr')}/{_w('numId')}")
+                    self.numbering_styles[style_id] = num_id.get(W_VAL) if num_id is not None else None
+
+        # abstractNumId -> ({ilvl: ordered}, numStyleLink); numId -> abstractNumId; pStyle -> (ilvl, ordered)
+        self.abstract_nums: Dict[str, Tuple[Dict[str, bool], Optional[str]]] = {}
+        self.nums: Dict[str, str] = {}
+        self.levels_by_style: Dict[str, Tuple[str, bool]] = {}
+        numbering = self._xml("word/numbering.xml")
+        if numbering is not None:
+            for abstract in numbering.iter(_w("abstractNum")):
+                levels: Dict[str, bool] = {}
+                unindexed = None
+                for lvl in abstract.iter(_w("lvl")):
+                    fmt = lvl.find(_w("numFmt"))
+                    ordered = (fmt.get(W_VAL) if fmt is not None else None) != "bullet"
+                    ilvl = lvl.get(_w("ilvl"))
+                    if ilvl is None:
+                        ilvl, unindexed = "0", ordered
+                    else:
+                        levels[ilvl] = ordered
+                    style = lvl.find(_w("pStyle"))
+                    if style is not None:
+                        self.levels_by_style[style.get(W_VAL)] = (ilvl, ordered)
+                if unindexed is not None:
+                    levels.setdefault("0", unindexed)
+                link = abstract.find(_w("numStyleLink"))
+                self.abstract_nums[abstract.get(_w("abstractNumId"))] = (
+                    levels, link.get(W_VAL) if link is not None else None
+                )
+            for num in numbering.iter(_w("num")):
+                abstract_id = num.find(_w("abstractNumId"))
+                if abstract_id is not None:
+                    self.nums[num.get(_w("numId"))] = abstract_id.get(W_VAL)
+
+    def _xml(self, name: str):
+        try:
+            return etree.fromstring(self.zip.read(name))
+        except KeyError:
+            return None
+
+    def _rels(self, name: str) -> Dict[str, Tuple[str, Optional[str], str]]:
+        """Id -> (target, target mode, type) of a relationships part."""
+        root = self._xml(name)
+        if root is None:
+            return {}
+        return {
+            rel.get("Id"): (rel.get("Target"), rel.get("TargetMode"), rel.get("Type"))
+            for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship")
+        }
+
+    def target(self, rel_id: str) -> str:
+        return self.rels[rel_id][0]
+
+    def content_type(self, path: str) -> Optional[str]:
+        if path in self.content_types:
+            return self.content_types[path]
+        ext = path.rpartition(".")[2]
+        if ext in self.default_types:
+            return self.default_types[ext]
+        image_type = _IMAGE_TYPES.get(ext.lower())
+        return f"image/{image_type}" if image_type else None
+
+    def list_level(self, num_id: str, ilvl: str, seen: Optional[set] = None) -> Optional[Tuple[str, bool]]:
+        """(level index, ordered) of a numbering instance's level, following numStyleLink."""
+        seen = seen if seen is not None else set()
+        if num_id in seen or num_id not in self.nums:
+            return None
+        seen.add(num_id)
+        abstract = self.abstract_nums.get(self.nums[num_id])
+        if abstract is None:
+            return None
+        levels, link = abstract
+        if link is not None:
+            linked = self.numbering_styles.get(link)
+            return self.list_level(linked, ilvl, seen) if linked is not None else None
+        return (ilvl, levels[ilvl]) if ilvl in levels else None
+
+
+class _Blocks:
+    """
+    Block sequence of the body or a table cell. List items are nested like the
+    default style map's "ul|ol > li > ul > li" paths: an item joins the open
+    list at its level, or opens one inside the last item of the level above.
+    """
+
+    def __init__(self, emit: Callable):
+        self.emit = emit
+        # open lists, outermost first: [list element, its last li]
+        self.lists: List[list] = []
+
+    def add(self, el) -> None:
+        self.flush()
+        self.emit(el)
+
+    def add_item(self, li, level: int, ordered: bool) -> None:
+        tag = "ol" if ordered else "ul"
+        depth = level + 1
+        del self.lists[depth:]
+        if len(self.lists) == depth and self.lists[-1][0].tag != tag:
+            if depth == 1:
+                self.flush()
+            else:
+                self.lists.pop()
+        while len(self.lists) < depth:
+            innermost = len(self.lists) == depth - 1
+            lst = etree.Element(tag if innermost else "ul")
+            if self.lists:
+                self.lists[-1][1].append(lst)
+            self.lists.append([lst, None if innermost else etree.SubElement(lst, "li")])
+        self.lists[-1][0].append(li)
+        self.lists[-1][1] = li
+
+    def flush(self) -> None:
+        if self.lists:
+            self.emit(self.lists[0][0])
+            self.lists = []
+
+
+class _Converter:
+    """Converts the paragraphs and tables of one document; holds state that spans them."""
+
+    def __init__(self, package: _Package, image_handler: ImageHandler):
+        self.package = package
+        self.image_handler = image_handler
+        # Complex fields: "begin" until separated, then the hyperlink attributes or None
+        self.fields: List[Union[str, Optional[Dict[str, str]]]] = []
+        self.instr: List[str] = []
+        # Content of deleted paragraph marks, moved into the next paragraph
+        self.deleted: List = []
+
+    # ---- blocks ----
+
+    def block(self, el, blocks: _Blocks) -> None:
+        """Convert a block-level element (body or table cell content)."""
+        tag = el.tag
+        if tag == W_P:
+            self.paragraph(el, blocks)
+        elif tag == W_TBL:
+            blocks.add(self.table(el))
+        elif tag == W_BOOKMARK_START:
+            anchor = self.bookmark(el)
+            if anchor is not None:
+                blocks.add(anchor)
+        elif tag == _w("sdt"):
+            self._check_sdt(el)
+            for child in el.iterchildren(_w("sdtContent")):
+                for c in child:
+                    self.block(c, blocks)
+        elif tag in (_w("customXml"), _w("ins"), _w("moveTo")):
+            for c in el:
+                self.block(c, blocks)
+        elif tag == f"{{{MC_NS}}}AlternateContent":
+            for fallback in el.iterchildren(MC_FALLBACK):
+                for c in fallback:
+                    self.block(c, blocks)
+
+    def paragraph(self, p, blocks: _Blocks) -> None:
+        ppr = p.find(_w("pPr"))
+        if ppr is not None and ppr.find(f"{_w('rPr')}/{_w('del')}") is not None:
+            # Deleted paragraph mark: its content joins the next paragraph
+            self.deleted.extend(copy.deepcopy(c) for c in p)
+            return
+        style_id = None
+        num_pr = None
+        if ppr is not None:
+            style = ppr.find(_w("pStyle"))
+            style_id = style.get(W_VAL) if style is not None else None
+            num_pr = ppr.find(_w("numPr"))
+        style_name = (self.package.paragraph_styles.get(style_id) or "").upper() if style_id else ""
+
+        heading = _HEADING_ID.fullmatch(style_id or "") or _HEADING_NAME.fullmatch(style_name)
+        list_level = None
+        if heading:
+            tag = f"h{heading.group(1)}"
+        elif style_id == "Heading" or style_name == "HEADING":
+            tag = "h1"
+        else:
+            tag = "p"
+            if style_name not in _NOTE_STYLE_NAMES:
+                list_level = self._list_level(style_id, num_pr)
+
+        el = etree.Element("li" if list_level else tag)
+        children = list(p)
+        if self.deleted:
+            children, self.deleted = self.deleted + children, []
+        self.inline(children, el, ())
+        if _is_empty(el):
+            return
+        if list_level:
+            blocks.add_item(el, *list_level)
+        else:
+            blocks.add(el)
+
+    def _list_level(self, style_id: Optional[str], num_pr) -> Optional[Tuple[int, bool]]:
+        num_id = ilvl = None
+        if num_pr is not None:
+            num_el, ilvl_el = num_pr.find(_w("numId")), num_pr.find(_w("ilvl"))
+            num_id = num_el.get(W_VAL) if num_el is not None else None
+            ilvl = ilvl_el.get(W_VAL) if ilvl_el is not None else None
+        if num_id is not None and ilvl is not None:
+            level = self.package.list_level(num_id, ilvl)
+        elif style_id is not None and style_id in self.package.levels_by_style:
+            level = self.package.levels_by_style[style_id]
+        elif num_id is not None:
+            level = self.package.list_level(num_id, "0")
+        else:
+            level = None
+        if level is None or level[0] not in {str(i) for i in range(MAX_LIST_LEVEL)}:
+            return None
+        return int(level[0]), level[1]
+
+    def table(self, tbl):
+        rows = []
+        for row in tbl:
+            if row.tag == W_TR:
+                trpr = row.find(_w("trPr"))
+                if trpr is not None and trpr.find(_w("del")) is not None:
+                    continue
+                rows.append((row, trpr is not None and trpr.find(_w("tblHeader")) is not None, []))
+            elif row.tag not in (_w("tblPr"), _w("tblGrid"), _w("bookmarkEnd"), _w("proofErr")):
+                raise UnsupportedDocx(f"{etree.QName(row).localname} between table rows")
+
+        # Vertically merged cells: continuation cells are dropped, their origin spans the rows.
+        # Every cell is still converted in document order: a deleted paragraph mark
+        # moves its content into the next paragraph, even one that is then dropped.
+        origins: Dict[int, Dict] = {}
+        for row, _, cells in rows:
+            col = 0
+            for tc in row:
+                if tc.tag != W_TC:
+                    if tc.tag not in (_w("trPr"), _w("tblPrEx"), _w("bookmarkEnd"), _w("proofErr")):
+                        raise UnsupportedDocx(f"{etree.QName(tc).localname} between table cells")
+                    continue
+                tcpr = tc.find(_w("tcPr"))
+                span = tcpr.find(_w("gridSpan")) if tcpr is not None else None
+                colspan = int(span.get(W_VAL)) if span is not None else 1
+                vmerge = tcpr.find(_w("vMerge")) if tcpr is not None else None
+                content = etree.Element("td")
+                blocks = _Blocks(content.append)
+                for child in tc:
+                    self.block(child, blocks)
+                blocks.flush()
+                if vmerge is not None and vmerge.get(W_VAL) in (None, "", "continue") and col in origins:
+                    origins[col]["rowspan"] += 1
+                else:
+                    cell = {"content": content, "colspan": colspan, "rowspan": 1}
+                    origins[col] = cell
+                    cells.append(cell)
+                col += colspan
+
+        table = etree.Element("table")
+        head = 0
+        while head < len(rows) and rows[head][1]:
+            head += 1
+        if head:
+            self._rows(etree.SubElement(table, "thead"), rows[:head], "th")
+            if rows[head:]:
+                self._rows(etree.SubElement(table, "tbody"), rows[head:], "td")
+        else:
+            self._rows(table, rows, "td")
+        return table
+
+    def _rows(self, parent, rows, cell_tag: str) -> None:
+        for _, _, cells in rows:
+            tr = etree.SubElement(parent, "tr")
+            for cell in cells:
+                td = cell["content"]
+                td.tag = cell_tag
+                if cell["colspan"] != 1:
+                    td.set("colspan", str(cell["colspan"]))
+                if cell["rowspan"] != 1:
+                    td.set("rowspan", str(cell["rowspan"]))
+                tr.append(td)
+
+    def bookmark(self, el):
+        name = el.get(_w("name"))
+        if name == "_GoBack":
+            return None
+        return etree.Element("a", {"id": name})
+
+    def _check_sdt(self, sdt) -> None:
+        if sdt.find(f"{_w('sdtPr')}/{{{W14_NS}}}checkbox") is not None:
+            raise UnsupportedDocx("checkboxes")
+
+    # ---- inline content ----
+
+    def inline(self, nodes, out, chain: Chain) -> None:
+        """Convert paragraph / run content into out, inside chain."""
+        for node in nodes:
+            tag = node.tag
+            if not isinstance(tag, str):
+                continue
+            if tag == W_R:
+                self.run(node, out, chain)
+            elif tag == _w("t"):
+                if node.text:
+                    _append(out, chain, node.text)
+            elif tag == _w("tab"):
+                _append(out, chain, "\t")
+            elif tag == _w("br"):
+                if node.get(_w("type")) in (None, "", "textWrapping"):
+                    _append(out, chain, etree.Element("br"))
+            elif tag == _w("noBreakHyphen"):
+                _append(out, chain, "‑")
+            elif tag == _w("softHyphen"):
+                _append(out, chain, "­")
+            elif tag == _w("fldChar"):
+                self._field_char(node)
+            elif tag == _w("instrText"):
+                self.instr.append(node.text or "")
+            elif tag == _w("hyperlink"):
+                self.inline(node, out, chain + self._hyperlink(node))
+            elif tag == W_BOOKMARK_START:
+                anchor = self.bookmark(node)
+                if anchor is not None:
+                    _append(out, chain, anchor)
+            elif tag == _w("sdt"):
+                self._check_sdt(node)
+                for content in node.iterchildren(_w("sdtContent")):
+                    self.inline(content, out, chain)
+            elif tag == f"{{{MC_NS}}}AlternateContent":
+                for fallback in node.iterchildren(MC_FALLBACK):
+                    self.inline(fallback, out, chain)
+            elif tag in (f"{{{WP_NS}}}inline", f"{{{WP_NS}}}anchor"):
+                self._drawing(node, out, chain)
+            elif tag == f"{{{V_NS}}}imagedata":
+                rel_id = node.get(R_ID)
+                if rel_id is not None:
+                    _append(out, chain, self._image(rel_id, node.get(f"{{{O_NS}}}title")))
+            elif tag in _TRANSPARENT:
+                self.inline(node, out, chain)
+            elif tag in _UNSUPPORTED:
+                raise UnsupportedDocx(_UNSUPPORTED[tag])
+
+    def run(self, r, out, chain: Chain) -> None:
+        # Wrappers outermost first, in the order mammoth nests them
+        wrappers: List[Tuple[str, Dict[str, str]]] = []
+        rpr = r.find(_w("rPr"))
+        if rpr is not None:
+            style = rpr.find(_w("rStyle"))
+            if style is not None and (self.package.character_styles.get(style.get(W_VAL)) or "").upper() == "STRONG":
+                wrappers.append(("strong", {}))
+            if _on(rpr.find(_w("b"))):
+                wrappers.append(("strong", {}))
+            if _on(rpr.find(_w("i"))):
+                wrappers.append(("em", {}))
+            valign = rpr.find(_w("vertAlign"))
+            valign = valign.get(W_VAL) if valign is not None else None
+            if valign == "superscript":
+                wrappers.append(("sup", {}))
+            elif valign == "subscript":
+                wrappers.append(("sub", {}))
+            if _on(rpr.find(_w("strike"))):
+                wrappers.append(("s", {}))
+        link = next((f for f in reversed(self.fields) if isinstance(f, dict)), None)
+        if link is not None:
+            wrappers.append(("a", link))
+        self.inline(r, out, chain + tuple(wrappers))
+
+    def _field_char(self, node) -> None:
+        kind = node.get(_w("fldCharType"))
+        if kind == "begin":
+            self.fields.append("begin")
+            self.instr = []
+        elif kind == "separate" and self.fields:
+            self.fields.pop()
+            self.fields.append(self._parse_field())
+        elif kind == "end" and self.fields:
+            if self.fields.pop() == "begin":
+                self._parse_field()
+
+    def _parse_field(self) -> Optional[Dict[str, str]]:
+        instr = "".join(self.instr)
+        m = _FIELD_HYPERLINK.match(instr)
+        if m is not None:
+            location = m.group(3) if m.group(2) is None else m.group(2)
+            return {"href": location if m.group(1) is None else f"#{location}"}
+        if re.match(r"\s*FORMCHECKBOX\s*", instr):
+            raise UnsupportedDocx("checkboxes")
+        return None
+
+    def _hyperlink(self, node) -> Chain:
+        rel_id, anchor = node.get(R_ID), node.get(_w("anchor"))
+        if rel_id is not None:
+            href = self.package.target(rel_id)
+            if anchor is not None:
+                href = f"{href.partition('#')[0]}#{anchor}"
+        elif anchor is not None:
+            href = f"#{anchor}"
+        else:
+            return ()
+        attrs = {"href": href}
+        frame = node.get(_w("tgtFrame"))
+        if frame:
+            attrs["target"] = frame
+        return (("a", attrs),)
+
+    def _drawing(self, node, out, chain: Chain) -> None:
+        props = node.find(f"{{{WP_NS}}}docPr")
+        alt = None
+        href = None
+        if props is not None:
+            alt = props.get("descr") if (props.get("descr") or "").strip() else props.get("title")
+            click = props.find(f"{{{A_NS}}}hlinkClick")
+            if click is not None and click.get(R_ID):
+                href = self.package.target(click.get(R_ID))
+        path = f"{{{A_NS}}}graphic/{{{A_NS}}}graphicData/{{{PIC_NS}}}pic/{{{PIC_NS}}}blipFill/{{{A_NS}}}blip"
+        for blip in node.iterfind(path):
+            rel_id = blip.get(R_EMBED)
+            if rel_id is None:
+                raise UnsupportedDocx("linked images")
+            img = self._image(rel_id, alt)
+            _append(out, chain + ((("a", {"href": href}),) if href else ()), img)
+
+    def _image(self, rel_id: str, alt: Optional[str]):
+        target = self.package.target(rel_id)
+        path = target[1:] if target.startswith("/") else f"word/{target}"
+        content_type = self.package.content_type(path)
+        attrs = {"alt": alt} if alt else {}
+        attrs.update(self.image_handler(self.package.zip.read(path), content_type))
+        return etree.Element("img", attrs)
+
+
+def _release(el) -> None:
+    """Free a converted element and everything before it in its parent (iterparse memory)."""
+    el.clear()
+    parent = el.getparent()
+    if parent is not None:
+        while el.getprevious() is not None:
+            del parent[0]
+
+
+def iter_blocks(
+    source: Union[str, Path, bytes, BinaryIO],
+    image_handler: Optional[ImageHandler] = None,
+) -> Iterator:
+    """
+    Yield the XHTML block elements (p, h1-h6, ul, ol, table, a) of a DOCX
+    (a path, its bytes, or a binary file object) in document order. Images go
+    through image_handler, by default inlined as data URIs. Raises
+    UnsupportedDocx, possibly after some blocks were yielded, for content
+    this converter does not handle.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as z:
+        conv = _Converter(_Package(z), image_handler or data_uri_image)
+        ready: List = []
+        blocks = _Blocks(ready.append)
+        # Open p / tbl (and mc:Choice, which mammoth skips) around the current element
+        depth = 0
+        root_seen = False
+        with z.open(conv.package.document) as f:
+            for event, el in etree.iterparse(f, events=("start", "end")):
+                tag = el.tag
+                if event == "start":
+                    if not root_seen:
+                        root_seen = True
+                        if tag != _w("document"):
+                            raise UnsupportedDocx(f"unexpected document root {tag}")
+                    elif tag in (W_P, W_TBL, MC_CHOICE):
+                        depth += 1
+                    continue
+                if tag in (W_P, W_TBL, MC_CHOICE):
+                    depth -= 1
+                    if depth:
+                        continue
+                    if tag != MC_CHOICE:
+                        conv.block(el, blocks)
+                elif tag == W_BOOKMARK_START and not depth:
+                    conv.block(el, blocks)
+                else:
+                    continue
+                _release(el)
+                yield from ready
+                ready.clear()
+        blocks.flush()
+        yield from ready
@@ -10,11 +10,14 @@ import zipfile
 import shutil
 from openpyxl import load_workbook
 
+from qid_layout import QidIndex
+
 # --------------- CONFIG ---------------
 EXCEL_PATH = "sharepoint_folders.xlsx"    # your Excel file
 COLUMN_URL_HEADER = "FolderURL"           # header name for the column that has hyperlinks
 COLUMN_QID_HEADER = "QID"                 # header name for QID
 OUTPUT_BASE = Path("output")              # where extracted content goes
+OUTPUT_LAYOUT = "flat"                    # "sharded": OUTPUT_BASE/ab/cd/QID_<id> (see qid_layout.py)
 DOWNLOADS_DIR = Path.home() / "Downloads"
 PER_FOLDER_TIMEOUT = 600                  # seconds to wait for each folder ZIP
 STABLE_SECONDS = 4                        # how long a file size must be stable
@@ -137,12 +140,12 @@ def unzip_to_target(zip_path: Path, target_dir: Path):
                         src.rename(dst)
 
 
-def process_folder(url: str, qid_value) -> tuple[bool, str]:
-    """Open folder link in Safari, trigger ZIP download, extract to QID folder."""
+def process_folder(url: str, qid_value, qid_index: QidIndex) -> tuple[bool, str]:
+    """Open folder link in Safari, trigger ZIP download, extract to QID folder (from qid_index)."""
     qid_str = str(qid_value).strip()
     if not qid_str:
         return False, f"Empty QID for URL: {url}"
-    target_dir = OUTPUT_BASE / f"QID_{qid_str}"
+    target_dir = qid_index.folder(qid_str, f"QID_{qid_str}")
 
     start_ts = time.time()
     folder_url = force_download_param(url)
@@ -295,16 +298,21 @@ def main():
 
     print(f"Found {len(rows)} rows with folder links and QIDs. Starting…")
 
+    qid_index = QidIndex.load(OUTPUT_BASE, OUTPUT_LAYOUT)
     ok = 0
     fails = []
-    for i, (url, qid) in enumerate(rows, 1):
-        t0 = datetime.now().strftime("%H:%M:%S")
-        print(f"[{i}/{len(rows)} {t0}] QID={qid} :: {url}")
-        success, msg = process_folder(url, qid)
-        print("  ->", msg)
-        ok += int(success)
-        if not success:
-            fails.append(f"QID={qid} :: {url} :: {msg}")
+    try:
+        for i, (url, qid) in enumerate(rows, 1):
+            t0 = datetime.now().strftime("%H:%M:%S")
+            print(f"[{i}/{len(rows)} {t0}] QID={qid} :: {url}")
+            success, msg = process_folder(url, qid, qid_index)
+            print("  ->", msg)
+            ok += int(success)
+            if not success:
+                fails.append(f"QID={qid} :: {url} :: {msg}")
+    finally:
+        # Also on Ctrl-C: folders already extracted stay findable
+        qid_index.save()
 
     print(f"\nDone. Success: {ok}/{len(rows)}")
     if fails:
@@ -0,0 +1,262 @@
+# format_bulk.py
+"""
+Reformat saved answers in bulk (e.g. the messages of saved predict responses) with the
+formatters in formatting.py or the check.py normalizers, across a process pool.
+
+Usage:
+  python format_bulk.py INPUT [INPUT ...] \
+      --output-dir /path/to/output_dir \
+      --field content.message    # optional: JSONL field holding the text (dotted path, default "message")
+      --output-field formatted   # optional: write the result to this field instead of replacing --field
+      --engine fast              # optional: fast (default) / format_text1 / format_text / normalize:<profile>
+      --workers 8                # optional: process pool size (default: CPU count; 1 = in-process)
+      --chunk-mb 1               # optional: input per work unit
+      --glob "*.jsonl"           # optional, repeatable: files picked up in directory inputs
+
+Inputs:
+  - *.jsonl files: one JSON object per line; the string at --field is formatted
+  - other files: the whole file is one text
+  - directories: the files under them matching --glob (default *.jsonl, *.txt, *.md)
+
+Behavior:
+  - Outputs are written to output_dir under the same name (a directory input keeps its
+    name and relative paths); inputs that would overwrite themselves or share an output
+    path are refused before anything is written.
+  - "fast" is formatting.format_text_fast (same output as format_text1, one pass per line).
+  - Inputs are read in work units of about --chunk-mb: a slice of a JSONL file's lines, or
+    several small text files. Only a few units per worker are in flight, and JSONL results
+    are appended to their output in input order as they complete, so memory stays flat
+    whatever the size of the input.
+  - JSONL lines that are not JSON objects, have no string at --field or make the engine
+    raise are written unchanged and counted as skipped; so are text files that are not
+    UTF-8 or make the engine raise.
+  - Prints what was formatted and the throughput in MB/s (input bytes over wall time).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from check import PROFILES, normalize_legal_text
+from formatting import format_text, format_text1, format_text_fast
+
+ENGINES: Dict[str, Callable[[str], str]] = {
+    "fast": format_text_fast,
+    "format_text1": format_text1,
+    "format_text": format_text,
+}
+ENGINES.update({f"normalize:{name}": partial(normalize_legal_text, profile=name) for name in PROFILES})
+
+DEFAULT_GLOBS = ["*.jsonl", "*.txt", "*.md"]
+# Work units in flight per worker
+UNITS_PER_WORKER = 4
+
+
+# -------- Work units (run in the pool) --------
+
+def _field_parent(obj, keys: List[str], create: bool = False) -> Optional[Dict]:
+    """The dict holding keys[-1] along a dotted path, or None (created on the way if create)."""
+    for key in keys[:-1]:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.setdefault(key, {}) if create else obj.get(key)
+    return obj if isinstance(obj, dict) else None
+
+
+def format_jsonl_lines(lines: List[bytes], engine: str, field: str,
+                       output_field: Optional[str]) -> Tuple[bytes, int, int]:
+    """Format a slice of a JSONL file; returns (output lines, records formatted, lines skipped)."""
+    fmt = ENGINES[engine]
+    keys = field.split(".")
+    out_keys = output_field.split(".") if output_field else keys
+    out: List[bytes] = []
+    formatted = skipped = 0
+    for raw in lines:
+        try:
+            obj = json.loads(raw)
+        except ValueError:  # also UnicodeDecodeError
+            obj = None
+        parent = _field_parent(obj, keys)
+        text = parent.get(keys[-1]) if parent is not None else None
+        target = _field_parent(obj, out_keys, create=True) if isinstance(text, str) else None
+        try:
+            result = fmt(text) if target is not None else None
+        except Exception:  # one bad record must not sink the unit
+            result = None
+        if result is None:
+            out.append(raw if raw.endswith(b"\n") else raw + b"\n")
+            skipped += bool(raw.strip())
+            continue
+        target[out_keys[-1]] = result
+        out.append(json.dumps(obj, ensure_ascii=False).encode("utf-8") + b"\n")
+        formatted += 1
+    return b"".join(out), formatted, skipped
+
+
+def format_text_files(pairs: List[Tuple[str, str]], engine: str) -> Tuple[int, int]:
+    """Format whole text files src -> dst; returns (files formatted, files skipped)."""
+    fmt = ENGINES[engine]
+    formatted = skipped = 0
+    for src, dst in pairs:
+        data = Path(src).read_bytes()
+        try:
+            data = fmt(data.decode("utf-8")).encode("utf-8")
+            formatted += 1
+        except Exception:  # not UTF-8, or the engine failed on it: copied unchanged
+            skipped += 1
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        Path(dst).write_bytes(data)
+    return formatted, skipped
+
+
+# -------- Inputs --------
+
+def collect_inputs(inputs: List[Path], output_dir: Path, globs: List[str]) -> List[Tuple[Path, Path]]:
+    """(src, dst) for every input file, dst mirroring it under output_dir."""
+    pairs = []
+    for path in inputs:
+        if path.is_dir():
+            found = sorted({p for pattern in globs for p in path.rglob(pattern) if p.is_file()})
+            pairs.extend((p, output_dir / path.name / p.relative_to(path)) for p in found)
+        else:
+            pairs.append((path, output_dir / path.name))
+    seen: Dict[Path, Path] = {}
+    for src, dst in pairs:
+        if dst.resolve() == src.resolve():
+            raise ValueError(f"Output would overwrite its input: {src}")
+        if dst in seen:
+            raise ValueError(f"Inputs {seen[dst]} and {src} would both be written to {dst}")
+        seen[dst] = src
+    return pairs
+
+
+def iter_units(pairs: List[Tuple[Path, Path]], chunk_bytes: int) -> Iterator[Dict]:
+    """Work units of about chunk_bytes each, in input order."""
+    batch: List[Tuple[str, str]] = []
+    batch_bytes = 0
+    for src, dst in pairs:
+        if src.suffix.lower() != ".jsonl":
+            batch.append((str(src), str(dst)))
+            batch_bytes += src.stat().st_size
+            if batch_bytes >= chunk_bytes:
+                yield {"kind": "text", "pairs": batch, "bytes": batch_bytes}
+                batch, batch_bytes = [], 0
+            continue
+        with open(src, "rb") as f:
+            lines: List[bytes] = []
+            size = 0
+            first = True
+            for line in f:
+                lines.append(line)
+                size += len(line)
+                if size >= chunk_bytes:
+                    yield {"kind": "jsonl", "dst": dst, "lines": lines, "bytes": size, "first": first, "last": False}
+                    lines, size, first = [], 0, False
+            yield {"kind": "jsonl", "dst": dst, "lines": lines, "bytes": size, "first": first, "last": True}
+    if batch:
+        yield {"kind": "text", "pairs": batch, "bytes": batch_bytes}
+
+
+# -------- Driver --------
+
+def run(pairs: List[Tuple[Path, Path]], args: argparse.Namespace) -> Dict[str, int]:
+    """Format every input across the pool, writing JSONL results in order as units complete."""
+    stats = {"records": 0, "files": 0, "skipped": 0, "bytes": 0}
+    total = sum(src.stat().st_size for src, _ in pairs)
+    chunk_bytes = max(1, int(args.chunk_mb * 1024 * 1024))
+    pool = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    inflight: Deque[Tuple[Dict, Callable[[], tuple]]] = deque()
+    out_file = None
+
+    def submit(fn, *fn_args) -> Callable[[], tuple]:
+        return pool.submit(fn, *fn_args).result if pool else partial(fn, *fn_args)
+
+    def finish(unit: Dict, result: Callable[[], tuple]) -> None:
+        nonlocal out_file
+        if unit["kind"] == "text":
+            formatted, skipped = result()
+            stats["files"] += formatted
+        else:
+            data, formatted, skipped = result()
+            stats["records"] += formatted
+            if unit["first"]:
+                unit["dst"].parent.mkdir(parents=True, exist_ok=True)
+                out_file = open(unit["dst"], "wb")
+            out_file.write(data)
+            if unit["last"]:
+                out_file.close()
+                out_file = None
+        stats["skipped"] += skipped
+        stats["bytes"] += unit["bytes"]
+        bar.update(unit["bytes"])
+
+    try:
+        with tqdm(total=total, unit="B", unit_scale=True, desc="Formatting") as bar:
+            depth = max(1, args.workers) * UNITS_PER_WORKER
+            for unit in iter_units(pairs, chunk_bytes):
+                if unit["kind"] == "text":
+                    result = submit(format_text_files, unit["pairs"], args.engine)
+                else:
+                    result = submit(format_jsonl_lines, unit["lines"], args.engine, args.field, args.output_field)
+                    del unit["lines"]
+                inflight.append((unit, result))
+                if len(inflight) >= depth:
+                    finish(*inflight.popleft())
+            while inflight:
+                finish(*inflight.popleft())
+    finally:
+        if out_file is not None:
+            out_file.close()
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reformat saved answers in bulk.")
+    parser.add_argument("inputs", nargs="+", type=Path, help="JSONL files, text files or directories")
+    parser.add_argument("--output-dir", required=True, type=Path, help="Where formatted copies are written")
+    parser.add_argument("--field", default="message",
+                        help="JSONL field holding the text, dotted for nested objects (e.g. content.message)")
+    parser.add_argument("--output-field", default=None,
+                        help="Write the formatted text to this field instead of replacing --field")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="fast",
+                        help="Formatter: fast = format_text1 in one pass; normalize:<profile> = check.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Process pool size (default: CPU count; 1 = no pool)")
+    parser.add_argument("--chunk-mb", type=float, default=1.0, help="Input per work unit")
+    parser.add_argument("--glob", action="append", default=None,
+                        help=f"File pattern for directory inputs, repeatable (default: {' '.join(DEFAULT_GLOBS)})")
+    args = parser.parse_args()
+
+    for path in args.inputs:
+        if not path.exists():
+            parser.error(f"Input not found: {path}")
+    try:
+        pairs = collect_inputs(args.inputs, args.output_dir, args.glob or DEFAULT_GLOBS)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    stats = run(pairs, args)
+    seconds = time.perf_counter() - start
+    mb = stats["bytes"] / (1024 * 1024)
+    print(f"Formatted {stats['records']} JSONL records and {stats['files']} files "
+          f"({mb:.1f} MB) in {seconds:.1f}s: {mb / seconds if seconds else 0:.1f} MB/s "
+          f"with {args.workers} worker(s), engine {args.engine}")
+    if stats["skipped"]:
+        print(f"Skipped (copied unchanged): {stats['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -357,3 +357,253 @@ def format_text1(text: str) -> str:
 
     except Exception as e:
         return text
+
+
+# ---- Single-pass engine (same output as format_text1) ----
+
+from typing import List, Optional
+
+_DOT_DASH = re.compile(r'\n\.\n\s*(-)')
+_PLAINTEXT = {"plaintext", "plain text"}
+# One match per line classifies it for both passes of format_text1:
+#   num            "12." at the very start (numbered item)
+#   lead           leading whitespace
+#   clause         1 / 1.1 / 1.1.a / 1.1.a.iv followed by text
+#   sub / roman    a. / iv. followed by text
+#   bullet         "- " (a bullet when lead is spaces only)
+_LINE = re.compile(r"""
+    (?:(?=(?P<num>\d+)\.)|)
+    (?P<lead>\s*)
+    (?:
+        (?P<clause>\d+(?:\.\d+)?(?:\.[a-z])?(?:\.[ivx]+)?)(?=\s+\S)
+      | (?P<sub>[a-z])\.(?=\s+\S)
+      | (?P<roman>[ivx]{1,5})\.(?=\s+\S)
+      | (?P<bullet>-\ )
+    )?
+""", re.IGNORECASE | re.VERBOSE)
+_CLAUSE_START = re.compile(r'\d+\.\d')
+_SUB_START = re.compile(r'[a-z]\.')
+
+
+def _leading_spaces(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+
+class LineFormatter:
+    """
+    format_text1 as one state machine: each line is matched once against
+    _LINE, then goes through list normalization (numbered / bullet /
+    continuation lines) and straight on to clause / sub-clause / roman
+    indentation, so no intermediate list of lines is built. feed() the
+    lines of an answer in order; the formatted lines are appended to `out`.
+    The "\\n.\\n -" clean-up of format_text1 runs on the whole text first
+    (see format_text_fast).
+    """
+
+    def __init__(self):
+        self.started = False  # a non-blank line was seen (leading "plaintext" check)
+        # List normalization
+        self.in_list = False
+        self.list_indent = 0
+        self.last_number = 0
+        # Clause indentation; prev is the previous normalized line
+        self.prev = ""
+        self.clause_level = 0
+        self.in_sub = False
+        self.in_roman = False
+        self.sub_indent = 0
+        self.roman_indent = 0
+
+    def feed(self, line: str, out: List[str]) -> None:
+        m = _LINE.match(line)
+        lead_end = m.end("lead")
+        if lead_end == len(line):
+            # Blank line: dropped inside a list block
+            if not self.in_list:
+                self._indent("", None, out)
+            return
+        if not self.started:
+            self.started = True
+            if line.strip().lower() in _PLAINTEXT:
+                return
+
+        num = None if lead_end else m.group("num")
+        if num is not None:
+            number = int(num)
+            if number == 1 and self.last_number > 1:
+                self._indent("", None, out)  # separate multiple lists
+            self._indent(line.rstrip(), m, out)
+            self.in_list = True
+            self.list_indent = 0
+            self.last_number = number
+            return
+
+        if m.lastgroup == "bullet" and lead_end and not line[:lead_end].strip(" "):
+            level = (lead_end + 2) // 2
+            self._indent(f"{'  ' * level}- {line[m.end():]}", None, out)
+            self.in_list = True
+            self.list_indent = level
+            return
+
+        if self.in_list and line.startswith(" "):
+            self._indent(f"{'  ' * self.list_indent}{line.rstrip()}", m, out)
+            return
+
+        if self.in_list:
+            self._indent("", None, out)
+            self.in_list = False
+            self.last_number = 0
+        self._indent(line.rstrip(), m, out)
+
+    def _indent(self, line: str, m: Optional[re.Match], out: List[str]) -> None:
+        """Clause pass for one normalized line; m is the _LINE match of its text (None: plain line)."""
+        kind = m.lastgroup if m is not None else None
+        if kind == "clause":
+            clause = m.group("clause")
+            levels = clause.count(".")
+            self.clause_level = levels
+            self.in_sub = False
+            self.in_roman = False
+            out.append(f"{'  ' * levels}{clause} {m.string[m.end():].strip()}")
+        elif kind == "sub" or kind == "roman":
+            prev = self.prev
+            this_indent = _leading_spaces(line)
+            if kind == "sub":
+                if not self.in_sub:
+                    if _CLAUSE_START.match(prev.strip()) and this_indent > _leading_spaces(prev):
+                        self.sub_indent = self.clause_level + 1
+                        self.in_sub = True
+                    else:
+                        self.sub_indent = this_indent // 2
+                indent = self.sub_indent
+            else:
+                if not self.in_roman:
+                    if _SUB_START.match(prev.strip()) and this_indent > _leading_spaces(prev):
+                        self.roman_indent = self.sub_indent + 1
+                        self.in_roman = True
+                    else:
+                        self.roman_indent = this_indent // 2
+                indent = self.roman_indent
+            out.append(f"{'  ' * indent}{m.group(kind)}. {m.string[m.end():].strip()}")
+        else:
+            out.append(line)
+            if not line.strip():
+                self.in_sub = False
+                self.in_roman = False
+        self.prev = line
+
+
+def format_text_fast(text: str) -> str:
+    """format_text1 in one linear pass over the lines (see LineFormatter)."""
+    engine = LineFormatter()
+    out: List[str] = []
+    for line in _DOT_DASH.sub('\n -', text).splitlines():
+        engine.feed(line, out)
+    return "\n".join(out)
+
+
+# ---- Streaming (same output as format_text1 on the concatenated chunks) ----
+
+from typing import Iterable, Iterator, Tuple
+
+# Characters str.splitlines() breaks lines at
+_LINE_BREAK = re.compile(r"[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]")
+
+
+def _split_end(raw: str) -> Tuple[str, str]:
+    """A line from splitlines(keepends=True) -> (line, line break)."""
+    line = raw.splitlines()[0]
+    return line, raw[len(line):]
+
+
+class StreamFormatter:
+    """
+    format_text1 for text that arrives in chunks (e.g. a streamed LLM answer):
+    feed() each chunk as it comes and it returns the formatted text that can
+    no longer change; close() at the end returns the rest. The returned
+    pieces concatenate to format_text1(<all chunks>).
+
+    Lines are formatted as soon as they are complete (LineFormatter), so only
+    the trailing incomplete line is held back - plus, while the "\\n.\\n -"
+    clean-up of format_text1 is undecided, a "." line and the blank lines
+    after it.
+    """
+
+    def __init__(self):
+        self.engine = LineFormatter()
+        self.pending: List[str] = []  # chunks of the incomplete last line
+        self.held = []                # (line, line end) of an undecided "\n.\n\s*-" match
+        self.after_nl = False         # the last line ended with "\n" (a match can start)
+        self.emitted = False
+
+    def feed(self, chunk: str) -> str:
+        # A trailing "\r" may still be the start of "\r\n"
+        if not _LINE_BREAK.search(chunk) and not (self.pending and self.pending[-1].endswith("\r")):
+            self.pending.append(chunk)
+            return ""
+        text = "".join(self.pending) + chunk
+        cut = len(text) - 1 if text.endswith("\r") else len(text)
+        lines = text[:cut].splitlines(keepends=True)
+        self.pending = [text[cut:]]
+        if lines and not _split_end(lines[-1])[1]:
+            self.pending.insert(0, lines.pop())
+        out: List[str] = []
+        for raw in lines:
+            self._line(*_split_end(raw), out)
+        return self._emit(out)
+
+    def close(self) -> str:
+        """Flush the held-back text at the end of the stream."""
+        out: List[str] = []
+        for raw in "".join(self.pending).splitlines(keepends=True):
+            self._line(*_split_end(raw), out)
+        self.pending = []
+        self._release(out)
+        return self._emit(out)
+
+    def _line(self, line: str, end: str, out: List[str]) -> None:
+        """One complete line; end is its line break ("" for the last line)."""
+        if self.held:
+            rest = line.lstrip()
+            if not rest:
+                self.held.append((line, end))
+                return
+            if rest[0] == "-":
+                # "\n.\n<blank lines>  -" -> "\n -"
+                self.held = []
+                line = f" -{rest[1:]}"
+            else:
+                self._release(out)
+        if self.after_nl and line == "." and end == "\n":
+            self.held.append((line, end))
+            return
+        self.engine.feed(line, out)
+        self.after_nl = end.endswith("\n")
+
+    def _release(self, out: List[str]) -> None:
+        """The held lines were no clean-up match after all: format them as they are."""
+        for line, end in self.held:
+            self.engine.feed(line, out)
+            self.after_nl = end.endswith("\n")
+        self.held = []
+
+    def _emit(self, out: List[str]) -> str:
+        if not out:
+            return ""
+        text = "\n".join(out)
+        if self.emitted:
+            text = "\n" + text
+        self.emitted = True
+        return text
+
+
+def format_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """Formatted pieces of a chunked answer, as soon as they are stable (see StreamFormatter)."""
+    formatter = StreamFormatter()
+    for chunk in chunks:
+        piece = formatter.feed(chunk)
+        if piece:
+            yield piece
+    piece = formatter.close()
+    if piece:
+        yield piece
@@ -0,0 +1,99 @@
+# qid_layout.py
+"""
+Where QID output folders live under an output root, shared by xhtml.py and
+download.py.
+
+Layouts:
+  - "flat":    <root>/QID_<id>            (one folder per QID directly under root)
+  - "sharded": <root>/ab/cd/QID_<id>      (ab, cd: first hex digits of the sha1 of
+                                            the folder name, 256 x 256 buckets)
+
+Every QID placed is recorded in <root>/qid_index.json:
+  {"version": 1, "layout": "sharded", "qids": {"<qid>": "ab/cd/QID_<id>", ...}}
+
+A QID that is already in the index keeps its folder whatever the layout of
+the current run, so switching layouts never splits a QID's outputs. Readers
+resolve a QID with QidIndex.load(root).lookup(qid) instead of building the
+path themselves; only the standard library is needed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+QID_INDEX_VERSION = 1
+QID_INDEX_NAME = "qid_index.json"
+LAYOUTS = ("flat", "sharded")
+# Levels of 2-hex-digit shard folders above each QID folder
+SHARD_LEVELS = 2
+
+
+def shard_prefix(dirname: str, levels: int = SHARD_LEVELS) -> str:
+    """Shard folders for a QID folder name, e.g. "3f/a0"."""
+    digest = hashlib.sha1(dirname.encode("utf-8")).hexdigest()
+    return "/".join(digest[2 * i:2 * i + 2] for i in range(levels))
+
+
+def layout_path(dirname: str, layout: str) -> str:
+    """Path of a QID folder relative to the output root, in the given layout."""
+    if layout == "sharded":
+        return f"{shard_prefix(dirname)}/{dirname}"
+    if layout == "flat":
+        return dirname
+    raise ValueError(f"Unknown QID layout {layout!r} (expected one of {LAYOUTS})")
+
+
+class QidIndex:
+    """QID -> folder mapping of an output root (see module docstring)."""
+
+    def __init__(self, root: Path, layout: str = "flat"):
+        self.root = Path(root)
+        self.layout = layout
+        self.qids: Dict[str, str] = {}
+        self.dirty = False
+
+    @property
+    def path(self) -> Path:
+        return self.root / QID_INDEX_NAME
+
+    @classmethod
+    def load(cls, root: Path, layout: str = "flat") -> "QidIndex":
+        """Read the root's index, if any; new QIDs are placed with `layout`."""
+        index = cls(root, layout)
+        try:
+            data = json.loads(index.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return index
+        if data.get("version") != QID_INDEX_VERSION:
+            raise ValueError(f"Unsupported QID index version {data.get('version')!r} in {index.path}")
+        index.qids = data["qids"]
+        return index
+
+    def save(self) -> None:
+        """Write the index if it changed (temp file + os.replace)."""
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = {"version": QID_INDEX_VERSION, "layout": self.layout, "qids": self.qids}
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def lookup(self, qid: str) -> Optional[Path]:
+        """Folder of a QID already in the index, or None."""
+        rel = self.qids.get(str(qid).strip())
+        return self.root / rel if rel is not None else None
+
+    def folder(self, qid: str, dirname: str) -> Path:
+        """Folder for a QID: its indexed one, else dirname placed in this layout (and recorded)."""
+        key = str(qid).strip()
+        rel = self.qids.get(key)
+        if rel is None:
+            rel = self.qids[key] = layout_path(dirname, self.layout)
+            self.dirty = True
+        return self.root / rel
@@ -0,0 +1,167 @@
+# text_index.py
+"""
+XPath -> text offset index for the XHTML written by xhtml.py.
+
+Next to every <stem>.xhtml, xhtml.py writes <stem>.xpath.json:
+  {"version": 1,
+   "text": "<plain text of the body, one line per block>",
+   "blocks": {"/html/body/div/p[2]": [start, end], ...}}
+
+"blocks" maps the XPath of every block element (p, h1-h6, li, td, div, ...)
+to the [start, end) character offsets of its text in "text", so a mapping
+entry's xpaths resolve to text with a dict lookup and a slice, without
+parsing the XHTML.
+
+XPaths are absolute, as produced by lxml's getpath() on the XHTML (no
+namespace). They are stored with every "[1]" predicate dropped, and lookups
+drop them too, so "/html[1]/body[1]/div[1]/p[2]" and "/html/body/div/p[2]"
+resolve to the same block.
+
+Only the standard library is needed to read an index (TextIndex); build_index
+walks an lxml tree and is called by xhtml.py's writer, IndexBuilder does the
+same block by block for its streaming writers.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".xpath.json"
+
+# Elements that start a new line in "text" and get an entry in "blocks"
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "caption", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr",
+    "li", "ol", "p", "pre", "section", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+})
+# Elements whose text is not document text
+SKIP_TAGS = frozenset({"head", "script", "style"})
+
+_FIRST_PREDICATE = re.compile(r"\[1\](?=/|$)")
+
+
+def index_path(xhtml_path: Path) -> Path:
+    """The sidecar index of an XHTML file: <stem>.xpath.json next to it."""
+    return xhtml_path.with_name(f"{xhtml_path.stem}{INDEX_SUFFIX}")
+
+
+def normalize_xpath(xpath: str) -> str:
+    """Canonical form used as the "blocks" key: whitespace stripped, "[1]" predicates dropped."""
+    return _FIRST_PREDICATE.sub("", xpath.strip())
+
+
+def build_index(root) -> Dict:
+    """
+    Index the body of an lxml html tree (see module docstring). Text comes from
+    .text / .tail as in itertext(); <br/> becomes a newline, and every block
+    element starts on a new line.
+    """
+    builder = IndexBuilder()
+    builder.add(root)
+    return builder.result()
+
+
+class IndexBuilder:
+    """
+    build_index in pieces, for writers that produce an XHTML block by block:
+    subtrees are add()-ed in document order with their XPath in the final
+    document, and enclosing block elements that are never built as a tree
+    (e.g. body) are bracketed with open() / close().
+    """
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.length = 0
+        self.blocks: Dict[str, List[int]] = {}
+
+    def _emit(self, s: str) -> None:
+        self.parts.append(s)
+        self.length += len(s)
+
+    def _newline(self) -> None:
+        if self.length and not self.parts[-1].endswith("\n"):
+            self._emit("\n")
+
+    def open(self) -> int:
+        """Start an enclosing block; returns its start offset, for close()."""
+        self._newline()
+        return self.length
+
+    def close(self, start: int, xpath: str) -> None:
+        """End the enclosing block opened at start and record it under xpath."""
+        # A nested block's line break ends the text, it is not part of it
+        end = self.length - 1 if self.length > start and self.parts[-1] == "\n" else self.length
+        self.blocks[normalize_xpath(xpath)] = [start, end]
+        self._newline()
+
+    def add(self, el, xpath: Optional[str] = None) -> None:
+        """Index el and its subtree (not its tail); xpath is el's path in the document, default its own."""
+        tree = el.getroottree()
+        base = tree.getpath(el)
+        prefix = base if xpath is None else xpath
+
+        def walk(node) -> None:
+            tag = node.tag if isinstance(node.tag, str) else ""  # comments / PIs have no text of their own
+            if tag in SKIP_TAGS:
+                return
+            block = tag in BLOCK_TAGS
+            start = self.open() if block else self.length
+            if tag == "br":
+                self._emit("\n")
+            if tag and node.text:
+                self._emit(node.text)
+            for child in node:
+                walk(child)
+                if child.tail:
+                    self._emit(child.tail)
+            if block:
+                self.close(start, prefix + tree.getpath(node)[len(base):])
+
+        walk(el)
+
+    def result(self) -> Dict:
+        text = "".join(self.parts)
+        return {"version": INDEX_VERSION, "text": text.rstrip("\n"), "blocks": self.blocks}
+
+
+def write_index(index: Dict, path: Path) -> None:
+    """Write an index as compact JSON."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+class TextIndex:
+    """A loaded sidecar index: resolve block XPaths to their text."""
+
+    def __init__(self, text: str, blocks: Dict[str, List[int]]):
+        self.text = text
+        self.blocks = blocks
+
+    @classmethod
+    def load(cls, path: Path) -> "TextIndex":
+        """Load <stem>.xpath.json (or the index next to an .xhtml path)."""
+        path = Path(path)
+        if path.suffix == ".xhtml":
+            path = index_path(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported text index version {data.get('version')!r} in {path}")
+        return cls(data["text"], data["blocks"])
+
+    def span(self, xpath: str) -> Optional[Tuple[int, int]]:
+        """[start, end) offsets of a block in .text, or None if the XPath is not a block."""
+        span = self.blocks.get(normalize_xpath(xpath))
+        return (span[0], span[1]) if span else None
+
+    def text_for(self, xpath: str) -> Optional[str]:
+        """Text of the block at xpath, or None if the XPath is not a block."""
+        span = self.span(xpath)
+        return self.text[span[0]:span[1]] if span else None
+
+    def text_for_all(self, xpaths: Iterable[str], sep: str = "\n") -> str:
+        """Text of several blocks (e.g. a mapping entry's "xpaths"), skipping unknown ones."""
+        return sep.join(t for t in (self.text_for(xp) for xp in xpaths) if t is not None)
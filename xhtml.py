@@ -11,28 +11,91 @@ Usage:
       --excel /path/to/cases.xlsx \
       --input-dir /path/to/input_dir \
       --output-dir /path/to/output_dir \
-      --sheet-name Sheet1
+      --sheet-name Sheet1 \
+      --workers 8            # optional: process pool (default 1 = serial)
+      --parallel-unit file   # optional: pool jobs per file instead of per case
+                             #   (stage: pdf / xhtml / copy pipeline, see --pdf-workers,
+                             #    --xhtml-workers, --copy-workers, --queue-depth)
+      --no-cache             # optional: ignore the content-hash conversion cache
+      --split-pages 300      # optional: parse PDFs this large as parallel page ranges
+                             #   (default 0 = off: each --workers process would start its own
+                             #    --split-workers pool, so only enable it with few workers)
+      --split-workers 4      # optional: processes per split PDF
+      --max-rss-mb 8000      # optional: run conversions in a supervised worker, kill it above this RSS
+      --timeout 600          # optional: ... or after this many seconds (status oom / timeout)
+      --fast-path            # optional: simple text PDFs go straight to XHTML (no DOCX)
+      --no-inventory         # optional: rescan input_dir instead of refreshing inventory.json
+      --resume               # optional: continue an interrupted batch from manifest.jsonl
+      --watch                # optional: then keep converting new/modified files (Linux inotify)
+      --layout sharded       # optional: QID folders under output_dir/ab/cd/QID_{QID} (see qid_layout.py)
+      --placement direct     # optional: no .work copies; link source DOCX and cache hits
+      --images extract       # optional: write DOCX images to QID_{QID}/assets, not data URIs
+      --docx-handoff memory  # optional: pass PDF->DOCX output to mammoth in memory, not via disk
+      --no-pdf-docx          # optional: don't write DOCX generated from PDFs at all (XHTML only)
+      --xhtml-writer stream  # optional: write XHTML incrementally (etree.xmlfile), one block per line
+      --compact-xhtml        # optional: no pretty-print whitespace in the XHTML
+      --docx-engine native   # optional: stream DOCX->XHTML with docx_stream.py (mammoth fallback)
+      --report-slowest 10    # optional: slowest conversions listed in the end-of-run report
 
 Excel columns required (case-insensitive): "QID", "Name of Case"
 Behavior:
   - Finds a subfolder in input_dir whose name matches "Name of Case" (case-insensitive,
-    tolerant to spaces/underscores/hyphens).
+    tolerant to spaces/underscores/hyphens and small typos); loose or ambiguous matches
+    are reported in the manifest (match, match_score, match_candidates).
   - In that folder:
       * For each .pdf -> convert to .docx (pdf2docx), then .docx -> .xhtml (mammoth + lxml)
+        (with --fast-path, simple text-layer PDFs go directly to .xhtml via PyMuPDF)
       * For each .docx -> .xhtml
   - Copies the resulting .docx and .xhtml into output_dir/QID_{QID}, ensuring filenames have
-    no spaces (spaces -> underscores) and removing illegal characters.
-  - Writes a manifest.csv summarizing work done.
+    no spaces (spaces -> underscores) and removing illegal characters. With --layout sharded
+    the QID folders are spread over hash-prefix subfolders; either way output_dir/qid_index.json
+    maps each QID to its folder (a QID already in it keeps its folder).
+  - With --docx-handoff memory, a DOCX generated from a PDF goes to mammoth as bytes
+    instead of being read back from disk; with --no-pdf-docx it is never written.
+  - With --docx-engine native, DOCX->XHTML streams word/document.xml block by block
+    (docx_stream.py, same markup as mammoth's default style map); documents with content
+    it does not handle (footnotes, comments, text boxes, ...) go through mammoth, and the
+    manifest records the engine used ("engine", "engine_fallback").
+  - Next to each .xhtml writes <name>.xpath.json: its plain text and the character
+    offsets of every block element's XPath (see text_index.py).
+  - Rows whose case names resolve to the same folder share one conversion of it: the
+    outputs are placed into each of their QID folders, with copy rows marked shared_from.
+  - With --max-rss-mb / --timeout, a conversion that breaches a limit is killed
+    and recorded with status "oom" / "timeout"; its worker is restarted and the
+    batch carries on.
+  - Streams a manifest.jsonl as work progresses (crash-safe, used by --resume) and
+    writes a manifest.csv summarizing work done, with wall/CPU time, bytes, pages and
+    peak RSS per conversion and copy; prints per-stage throughput and the slowest files.
 """
 
 from __future__ import annotations
 
 import argparse
+import csv
+import ctypes
+import difflib
+import hashlib
+import io
+import json
+import multiprocessing
+import multiprocessing.util
 import os
 import re
+import resource
+import select
 import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+from importlib import metadata as importlib_metadata
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
 
 import pandas as pd
 from tqdm import tqdm
@@ -40,9 +103,17 @@ from tqdm import tqdm
 # Third-party converters
 from pdf2docx import Converter as PDF2DOCXConverter
 import mammoth
+try:
+    import pymupdf as fitz  # PyMuPDF >= 1.24; installed with pdf2docx
+except ImportError:
+    import fitz
 from lxml import html as lxml_html
 from lxml import etree
 
+from docx_stream import CONVERTER_VERSION as NATIVE_DOCX_VERSION, iter_blocks
+from qid_layout import LAYOUTS, QidIndex, layout_path
+from text_index import INDEX_SUFFIX, IndexBuilder, build_index, index_path, write_index
+
 
 # -------- Utils --------
 
@@ -78,14 +149,15 @@ def norm_key(s: str) -> str:
     return re.sub(r"[ _\-]+", "", s.casefold())
 
 
-def map_subdirs_by_norm(root: Path) -> Dict[str, Path]:
+def map_subdirs_by_norm(root: Path, subdirs: Optional[List[Path]] = None) -> Dict[str, Path]:
     """
     Build a dictionary mapping normalized folder names to their actual Path.
     If duplicates normalize to the same key, last one wins (we also warn).
+    subdirs, if given, is the already known list of folders in root.
     """
     mapping: Dict[str, Path] = {}
-    for p in root.iterdir():
-        if p.is_dir():
+    for p in (root.iterdir() if subdirs is None else subdirs):
+        if subdirs is not None or p.is_dir():
             k = norm_key(p.name)
             if k in mapping and mapping[k] != p:
                 # You could log a warning here if desired
@@ -98,36 +170,528 @@ def ensure_dir(p: Path) -> None:
     p.mkdir(parents=True, exist_ok=True)
 
 
+# ioctl FICLONE: share extents copy-on-write (btrfs, XFS with reflink=1, ...)
+FICLONE = 0x40049409
+
+# Placement strategies, cheapest first. Reflinks are copy-on-write; hardlinks
+# share the inode, so outputs placed that way must be treated as read-only.
+PLACE_COPY = ("copy",)
+PLACE_LINK = ("reflink", "hardlink", "copy")
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    import fcntl  # POSIX only; ImportError falls through to the next method
+
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        try:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+        except OSError:
+            fd.close()
+            dst.unlink()
+            raise
+
+
+def place_file(src: Path, dst: Path, methods: Tuple[str, ...] = PLACE_COPY) -> str:
+    """
+    Materialize src at dst with the first method in `methods` that works and
+    return its name ("reflink", "hardlink", "copy"), or "in-place" if dst
+    already is src. An existing dst is unlinked first, never written through,
+    so a previous hardlink to a shared file (e.g. a cache entry) is not modified.
+    """
+    if dst.exists() and os.path.samefile(src, dst):
+        return "in-place"
+    ensure_dir(dst.parent)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    for method in methods:
+        try:
+            if method == "reflink":
+                _reflink(src, dst)
+            elif method == "hardlink":
+                os.link(src, dst)
+            else:
+                shutil.copy2(src, dst)
+            return method
+        except (OSError, ImportError):
+            if method == methods[-1]:
+                raise
+    raise ValueError(f"no placement method in {methods}")
+
+
+# Extracted images live in this folder next to the XHTML that references them,
+# named by content hash so each image is written (and copied) once per folder.
+ASSETS_DIR = "assets"
+
+
+def asset_names(row: Dict) -> List[str]:
+    """Names of the extracted images an XHTML manifest row references ("assets" column)."""
+    return [n for n in row.get("assets", "").split(";") if n]
+
+
+def place_assets(names: List[str], src_dir: Path, dst_dir: Path, methods: Tuple[str, ...] = PLACE_COPY) -> None:
+    """Place content-addressed assets into dst_dir; names already there are the same bytes, so skipped."""
+    for name in names:
+        dst = dst_dir / name
+        if not dst.exists():
+            place_file(src_dir / name, dst, methods)
+
+
+# -------- Manifest --------
+
+# Conversion actions, i.e. rows produced by convert_source_file
+CONVERSION_ACTIONS = ("pdf->docx", "pdf->xhtml", "docx->xhtml")
+# Marker written once every row of a case has been recorded; not part of manifest.csv
+CASE_DONE = "case-done"
+
+# Order in which actions appear in the manifest for a single case
+ACTION_ORDER = {"find-case-folder": -1, "pdf->docx": 0, "docx->xhtml": 1, "pdf->xhtml": 1, "copy-docx": 2, "copy-xhtml": 3}
+
+CaseKey = Tuple[str, str]
+
+
+def _drop_torn_tail(path: Path) -> None:
+    """
+    Truncate a JSONL log after its last newline: a crash mid-write leaves a torn
+    last line, and rows appended to it would be merged into that line and lost.
+    """
+    if not path.exists():
+        return
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            step = min(pos, 64 * 1024)
+            f.seek(pos - step)
+            cut = f.read(step).rfind(b"\n")
+            if cut >= 0:
+                pos = pos - step + cut + 1
+                break
+            pos -= step
+        if pos < end:
+            f.truncate(pos)
+
+
+class ManifestWriter:
+    """
+    Append-only JSONL manifest (output_dir/manifest.jsonl). Every row is written
+    and flushed as soon as it is recorded, so a crash loses at most the action in
+    flight. Rows carry "_run" (this run's id) so that a resumed run's rows
+    supersede those of earlier attempts when the log is compacted.
+    """
+
+    def __init__(self, path: Path, append: bool = False):
+        self.path = path
+        self.run_id = f"{time.time():.6f}"
+        if append:
+            _drop_torn_tail(path)
+        self._f = open(path, "a" if append else "w", encoding="utf-8")
+
+    def append(self, row: Dict) -> None:
+        row["_run"] = self.run_id
+        self._f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+    def __enter__(self) -> "ManifestWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Anything rows can be recorded into: a plain list (pool workers) or the log writer
+ManifestSink = Union[List[Dict], ManifestWriter]
+
+
+def iter_manifest_log(path: Path) -> Iterator[Dict]:
+    """Yield rows from a JSONL manifest, skipping a torn last line after a crash."""
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def _rows_reusable(rows: List[Dict]) -> bool:
+    """A source file can be skipped on resume if its whole chain succeeded and its outputs still exist."""
+    return (
+        bool(rows)
+        and rows[-1]["action"] in ("pdf->xhtml", "docx->xhtml")
+        and all(r["status"] == "ok" and (r.get("handoff") == "memory-only" or Path(r["output_file"]).exists())
+                for r in rows)
+        and all((Path(rows[-1]["output_file"]).parent / ASSETS_DIR / n).exists() for n in asset_names(rows[-1]))
+        and index_path(Path(rows[-1]["output_file"])).exists()
+    )
+
+
+def load_resume_state(path: Path) -> Tuple[set, Dict[CaseKey, Dict[str, List[Dict]]]]:
+    """
+    Read a previous manifest log for --resume. Returns:
+      - the (qid, case_name) keys of cases that finished without errors
+      - per case, the conversion rows of source files that can be reused as-is,
+        keyed by the original source path
+    """
+    completed = set()
+    latest: Dict[CaseKey, Dict[str, Tuple[str, List[Dict]]]] = {}
+    for row in iter_manifest_log(path):
+        key = (row.get("qid", ""), row.get("case_name", ""))
+        if row.get("action") == CASE_DONE:
+            if row.get("status") == "ok":
+                completed.add(key)
+            else:
+                completed.discard(key)
+        elif row.get("action") in CONVERSION_ACTIONS and row.get("_origin"):
+            per_case = latest.setdefault(key, {})
+            run, rows = per_case.get(row["_origin"], ("", []))
+            if run != row["_run"]:
+                rows = []
+            rows.append(row)
+            per_case[row["_origin"]] = (row["_run"], rows)
+
+    reusable = {
+        key: {origin: rows for origin, (_, rows) in per_case.items() if _rows_reusable(rows)}
+        for key, per_case in latest.items()
+    }
+    return completed, reusable
+
+
+def compact_manifest(path: Path, case_order: Dict[CaseKey, int]) -> List[Dict]:
+    """
+    Turn the manifest log into the final, deterministic manifest:
+      - per case, keep only rows from the latest run that touched it
+      - drop cases that are no longer in the Excel and case-done markers
+      - order by Excel row, then action (ACTION_ORDER), then source file
+    """
+    latest_run: Dict[CaseKey, str] = {}
+    for row in iter_manifest_log(path):
+        key = (row.get("qid", ""), row.get("case_name", ""))
+        latest_run[key] = max(latest_run.get(key, ""), row.get("_run", ""))
+
+    rows = []
+    for row in iter_manifest_log(path):
+        key = (row.get("qid", ""), row.get("case_name", ""))
+        if key not in case_order or row.get("_run") != latest_run[key] or row.get("action") == CASE_DONE:
+            continue
+        rows.append(row)
+    rows.sort(key=lambda r: (
+        case_order[(r["qid"], r["case_name"])],
+        ACTION_ORDER.get(r["action"], 0),
+        r.get("_src", 0),
+    ))
+    return rows
+
+
 def write_manifest(manifest_rows: List[Dict], out_dir: Path) -> None:
+    """Write manifest.csv; columns are the union of row keys, bookkeeping ("_*") keys excluded."""
     if not manifest_rows:
         return
-    df = pd.DataFrame(manifest_rows)
-    df.to_csv(out_dir / "manifest.csv", index=False)
+    fields: Dict[str, None] = {}
+    for row in manifest_rows:
+        fields.update(dict.fromkeys(k for k in row if not k.startswith("_")))
+    with open(out_dir / "manifest.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(fields), restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(manifest_rows)
 
 
 # -------- Converters --------
 
-def pdf_to_docx(pdf_path: Path, out_docx: Path) -> Tuple[bool, Optional[str]]:
-    """Convert a single PDF to DOCX using pdf2docx."""
-    try:
+def _docx_target(out_docx: Union[Path, BinaryIO]) -> Union[str, BinaryIO]:
+    """pdf2docx output argument: a file name, or a writable stream as is."""
+    if isinstance(out_docx, Path):
         ensure_dir(out_docx.parent)
+        return str(out_docx)
+    return out_docx
+
+
+def pdf_to_docx(pdf_path: Path, out_docx: Union[Path, BinaryIO]) -> Tuple[bool, Optional[str]]:
+    """Convert a single PDF to DOCX (a file, or a stream such as BytesIO) using pdf2docx."""
+    try:
+        target = _docx_target(out_docx)
         cv = PDF2DOCXConverter(str(pdf_path))
-        cv.convert(str(out_docx))  # converts all pages
+        cv.convert(target)  # converts all pages
+        cv.close()
+        return True, None
+    except Exception as e:
+        return False, f"pdf_to_docx failed: {e}"
+
+
+def pdf_page_count(pdf_path: Path) -> int:
+    with fitz.open(str(pdf_path)) as doc:
+        return doc.page_count
+
+
+def split_page_ranges(page_count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most `parts` contiguous, near-equal (start, end) ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _parse_pdf_page_range(pdf_path: str, start: int, end: int, json_path: str) -> None:
+    """Worker: parse pages [start, end) of a PDF and serialize the layout to json_path."""
+    cv = PDF2DOCXConverter(pdf_path)
+    try:
+        settings = cv.default_settings
+        cv.load_pages(start, end).parse_document(**settings).parse_pages(**settings)
+        cv.serialize(json_path)
+    finally:
         cv.close()
+
+
+def pdf_to_docx_split(
+    pdf_path: Path, out_docx: Union[Path, BinaryIO], page_count: int, workers: int
+) -> Tuple[bool, Optional[str]]:
+    """
+    Convert a large PDF by parsing page ranges in parallel worker processes, then
+    restoring all parsed pages into one converter and writing a single DOCX.
+
+    Same idea as pdf2docx's own multi_processing option, but with per-call temp
+    files (pdf2docx writes pages-N.json into the CWD, which races when several
+    PDFs are converted at once) and a pool bounded by `workers`.
+    """
+    try:
+        target = _docx_target(out_docx)
+        ranges = split_page_ranges(page_count, workers)
+        tmp_parent = out_docx.parent if isinstance(out_docx, Path) else None
+        with tempfile.TemporaryDirectory(prefix=".split-", dir=tmp_parent) as tmp:
+            json_paths = [str(Path(tmp) / f"pages-{i}.json") for i in range(len(ranges))]
+            with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                futures = [
+                    pool.submit(_parse_pdf_page_range, str(pdf_path), start, end, jp)
+                    for (start, end), jp in zip(ranges, json_paths)
+                ]
+                for fut in futures:
+                    fut.result()
+
+            cv = PDF2DOCXConverter(str(pdf_path))
+            try:
+                for jp in json_paths:
+                    cv.deserialize(jp)
+                cv.make_docx(target, **cv.default_settings)
+            finally:
+                cv.close()
         return True, None
     except Exception as e:
         return False, f"pdf_to_docx failed: {e}"
 
 
-def docx_to_xhtml(docx_path: Path, out_xhtml: Path) -> Tuple[bool, Optional[str]]:
+def pdf_to_docx_bytes(pdf_path: Path, page_count: int = 0, workers: int = 1) -> Tuple[bool, Optional[str], bytes]:
+    """
+    pdf_to_docx (or pdf_to_docx_split with workers > 1) into memory; the DOCX
+    bytes are the third element of the result, for handing straight to
+    docx_to_xhtml without a disk round-trip.
+    """
+    buf = io.BytesIO()
+    if workers > 1:
+        ok, err = pdf_to_docx_split(pdf_path, buf, page_count, workers)
+    else:
+        ok, err = pdf_to_docx(pdf_path, buf)
+    return ok, err, buf.getvalue() if ok else b""
+
+
+def _stream_xhtml(root_html, out_xhtml: Path, compact: bool) -> None:
+    """
+    Write root_html (as built by write_xhtml) with etree.xmlfile: the envelope
+    is written tag by tag and each block under the body wrapper is serialized
+    on its own, straight into the file, so the whole document never exists as
+    one bytes object. Blocks go one per line unless compact, or unless the
+    wrapper has text between them (like pretty_print, which leaves mixed
+    content as it is), so the text content matches the tree writer's.
+    """
+    head, body = root_html[0], root_html[1]
+    with etree.xmlfile(str(out_xhtml), encoding="utf-8") as xf:
+        xf.write_declaration()
+        xf.write_doctype("<!DOCTYPE html>")
+        with xf.element("html"):
+            xf.write(head)
+            with xf.element("body", body.attrib):
+                for wrapper in body:
+                    # A newline after text (wrapper.text or the previous block's
+                    # tail) would be added to that text
+                    spaced = not compact and not wrapper.text and not any(block.tail for block in wrapper)
+                    with xf.element(wrapper.tag, wrapper.attrib):
+                        if wrapper.text:
+                            xf.write(wrapper.text)
+                        for block in wrapper:
+                            if spaced:
+                                xf.write("\n")
+                            xf.write(block)
+                        if spaced:
+                            xf.write("\n")
+                    if wrapper.tail:
+                        xf.write(wrapper.tail)
+
+
+def write_xhtml(doc, out_xhtml: Path, writer: str = "tree", compact: bool = False) -> None:
+    """
+    Wrap `doc` in html > head(meta) + body and write it as XHTML (XML method),
+    plus its XPath -> text offset index (<stem>.xpath.json, see text_index.py).
+      - writer "tree": serialize the whole tree in one go (pretty-printed unless compact)
+      - writer "stream": write incrementally with etree.xmlfile (see _stream_xhtml)
+    """
+    root_html = lxml_html.Element("html")
+    head = lxml_html.Element("head")
+    meta = lxml_html.Element("meta", charset="utf-8")
+    head.append(meta)
+    body = lxml_html.Element("body")
+
+    # Move doc under body
+    body.append(doc)
+    root_html.append(head)
+    root_html.append(body)
+
+    if writer == "stream":
+        _stream_xhtml(root_html, out_xhtml, compact)
+    else:
+        # Serialize as XHTML (XML method)
+        xhtml_bytes = etree.tostring(
+            root_html,
+            pretty_print=not compact,
+            method="xml",
+            encoding="utf-8",
+            xml_declaration=True,
+            doctype='<!DOCTYPE html>'
+        )
+        with open(out_xhtml, "wb") as f:
+            f.write(xhtml_bytes)
+    write_index(build_index(root_html), index_path(out_xhtml))
+
+
+def write_xhtml_blocks(blocks: Iterable, out_xhtml: Path, compact: bool = False) -> None:
+    """
+    write_xhtml's stream output for a converter that yields the blocks under
+    the body wrapper one at a time (docx_stream.iter_blocks): each block is
+    written and indexed as it arrives, then dropped, so the document never
+    exists as one tree. Same envelope and index as write_xhtml.
+    """
+    head = lxml_html.Element("head")
+    head.append(lxml_html.Element("meta", charset="utf-8"))
+    index = IndexBuilder()
+    body_start = index.open()
+    div_start = index.open()
+    counts: Dict[str, int] = {}
+    with etree.xmlfile(str(out_xhtml), encoding="utf-8") as xf:
+        xf.write_declaration()
+        xf.write_doctype("<!DOCTYPE html>")
+        with xf.element("html"):
+            xf.write(head)
+            with xf.element("body"):
+                with xf.element("div"):
+                    for block in blocks:
+                        if not compact:
+                            xf.write("\n")
+                        xf.write(block)
+                        counts[block.tag] = counts.get(block.tag, 0) + 1
+                        index.add(block, f"/html/body/div/{block.tag}[{counts[block.tag]}]")
+                    if not compact:
+                        xf.write("\n")
+    index.close(div_start, "/html/body/div")
+    index.close(body_start, "/html/body")
+    write_index(index.result(), index_path(out_xhtml))
+
+
+def _image_saver(assets_dir: Path, stats: Dict) -> Callable[[bytes, Optional[str]], Dict[str, str]]:
+    """
+    (image bytes, content type) -> <img> attributes: writes each image once into
+    assets_dir, named by its content hash, and references it by relative path
+    instead of inlining a base64 data URI. Accumulates "images",
+    "image_bytes_saved" and the ";"-joined "assets" names into stats.
+    """
+    names: Dict[str, None] = dict.fromkeys(asset_names(stats))
+
+    def save(data: bytes, content_type: Optional[str]) -> Dict[str, str]:
+        # Extension as mammoth.images.image_filename_extension derives it
+        parts = re.split(r"/|\\", content_type or "")
+        ext = parts[1] if len(parts) > 1 else "bin"
+        name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+        target = assets_dir / name
+        if not target.exists():
+            ensure_dir(assets_dir)
+            # Several workers may extract the same image into a shared folder
+            tmp = target.with_name(f"{name}.{os.getpid()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, target)
+        src = f"{ASSETS_DIR}/{name}"
+        inline_len = len(f"data:{content_type};base64,") + 4 * ((len(data) + 2) // 3)
+        names[name] = None
+        stats["images"] = stats.get("images", 0) + 1
+        stats["image_bytes_saved"] = stats.get("image_bytes_saved", 0) + inline_len - len(src)
+        stats["assets"] = ";".join(names)
+        return {"src": src}
+
+    return save
+
+
+def _image_extractor(assets_dir: Path, stats: Dict) -> Callable:
+    """mammoth image converter around _image_saver."""
+    save = _image_saver(assets_dir, stats)
+
+    def convert(image) -> Dict[str, str]:
+        with image.open() as f:
+            data = f.read()
+        return save(data, image.content_type)
+
+    return mammoth.images.img_element(convert)
+
+
+def _docx_to_xhtml_native(
+    docx_path: Union[Path, bytes], out_xhtml: Path, assets_dir: Optional[Path], stats: Dict, compact: bool
+) -> None:
+    """docx_stream conversion (raises docx_stream.UnsupportedDocx for content it does not handle)."""
+    image_handler = _image_saver(assets_dir, stats) if assets_dir is not None else None
+    write_xhtml_blocks(iter_blocks(docx_path, image_handler), out_xhtml, compact)
+
+
+def docx_to_xhtml(
+    docx_path: Union[Path, bytes],
+    out_xhtml: Path,
+    assets_dir: Optional[Path] = None,
+    stats: Optional[Dict] = None,
+    writer: str = "tree",
+    compact: bool = False,
+    engine: str = "mammoth",
+) -> Tuple[bool, Optional[str]]:
     """
     Convert DOCX -> (X)HTML using mammoth (HTML5) then serialize as XHTML via lxml.
+    docx_path may also be the DOCX content itself (see pdf_to_docx_bytes).
+    Images are inlined as data URIs unless assets_dir is given, in which case they
+    are extracted there (see _image_extractor) and their totals added to stats.
+    writer / compact are passed to write_xhtml.
+    engine "native" converts with docx_stream.iter_blocks + write_xhtml_blocks
+    instead (writer is ignored) and falls back to mammoth if that fails; stats
+    then gets "engine" (the one that wrote the XHTML) and "engine_fallback" (why).
     """
     try:
         ensure_dir(out_xhtml.parent)
-        with open(docx_path, "rb") as f:
-            result = mammoth.convert_to_html(f)
+        if engine == "native":
+            # Image totals of a failed attempt must not count
+            native_stats: Dict = dict(stats) if stats is not None else {}
+            try:
+                _docx_to_xhtml_native(docx_path, out_xhtml, assets_dir, native_stats, compact)
+                if stats is not None:
+                    stats.update(native_stats, engine="native")
+                return True, None
+            except Exception as e:
+                if stats is not None:
+                    stats.update(engine="mammoth", engine_fallback=f"{type(e).__name__}: {e}"[:200])
+        convert_kwargs = {}
+        if assets_dir is not None:
+            convert_kwargs["convert_image"] = _image_extractor(assets_dir, stats if stats is not None else {})
+        with (io.BytesIO(docx_path) if isinstance(docx_path, bytes) else open(docx_path, "rb")) as f:
+            result = mammoth.convert_to_html(f, **convert_kwargs)
         html_str = result.value or ""
+        del result
 
         # Make a full XHTML document
         # If mammoth returns a fragment, wrap it.
@@ -142,178 +706,1895 @@ def docx_to_xhtml(docx_path: Path, out_xhtml: Path) -> Tuple[bool, Optional[str]
             wrapper = lxml_html.Element("div")
             wrapper.append(doc)
             doc = wrapper
+        # The parsed tree is all we need from here; don't hold the HTML string too
+        del html_str
 
-        root_html = lxml_html.Element("html")
-        head = lxml_html.Element("head")
-        meta = lxml_html.Element("meta", charset="utf-8")
-        head.append(meta)
-        body = lxml_html.Element("body")
+        write_xhtml(doc, out_xhtml, writer, compact)
 
-        # Move doc under body
-        body.append(doc)
-        root_html.append(head)
-        root_html.append(body)
+        return True, None
+    except Exception as e:
+        return False, f"docx_to_xhtml failed: {e}"
 
-        # Serialize as XHTML (XML method)
-        xhtml_bytes = etree.tostring(
-            root_html,
-            pretty_print=True,
-            method="xml",
-            encoding="utf-8",
-            xml_declaration=True,
-            doctype='<!DOCTYPE html>'
-        )
-        with open(out_xhtml, "wb") as f:
-            f.write(xhtml_bytes)
 
+# -------- PDF triage / fast path --------
+
+# A page needs at least this much extracted text to count as having a text layer
+TRIAGE_MIN_PAGE_CHARS = 20
+# Vector drawings per page tolerated before we assume tables / ruled forms
+TRIAGE_MAX_PAGE_DRAWINGS = 8
+
+
+def _blocks_side_by_side(blocks: List[Dict]) -> bool:
+    """True if two text blocks share a vertical band but not a horizontal one (columns, tables)."""
+    boxes = sorted((b["bbox"] for b in blocks), key=lambda bb: bb[1])
+    for i, (x0, y0, x1, y1) in enumerate(boxes):
+        for ox0, oy0, ox1, oy1 in boxes[i + 1:]:
+            if oy0 >= y1:
+                break
+            if ox0 >= x1 or ox1 <= x0:
+                return True
+    return False
+
+
+def triage_pdf(pdf_path: Path) -> Tuple[bool, str]:
+    """
+    Decide whether a PDF can take the direct PDF -> XHTML fast path.
+    Returns (simple, reason). Simple means every page has a text layer and a
+    single-column layout without images or table-like drawings; anything else
+    (scans, forms, tables, multi-column) goes through pdf2docx.
+    """
+    with fitz.open(str(pdf_path)) as doc:
+        if doc.needs_pass:
+            return False, "encrypted"
+        for page in doc:
+            n = page.number + 1
+            if page.get_images(full=False):
+                return False, f"images on page {n}"
+            data = page.get_text("dict")
+            text_blocks = [b for b in data["blocks"] if b.get("type") == 0]
+            chars = sum(len(s["text"].strip()) for b in text_blocks for l in b["lines"] for s in l["spans"])
+            if chars < TRIAGE_MIN_PAGE_CHARS:
+                return False, f"no text layer on page {n}"
+            if len(text_blocks) < len(data["blocks"]):
+                return False, f"images on page {n}"
+            if len(page.get_drawings()) > TRIAGE_MAX_PAGE_DRAWINGS:
+                return False, f"drawings on page {n}"
+            if _blocks_side_by_side(text_blocks):
+                return False, f"multi-column layout on page {n}"
+    return True, "simple"
+
+
+def _span_element(span: Dict):
+    """Map a PyMuPDF span to text wrapped in <strong>/<em> like mammoth does."""
+    text = span["text"]
+    flags = span.get("flags", 0)
+    el = None
+    if flags & 2:  # italic
+        el = lxml_html.Element("em")
+        el.text = text
+    if flags & 16:  # bold
+        strong = lxml_html.Element("strong")
+        if el is None:
+            strong.text = text
+        else:
+            strong.append(el)
+        el = strong
+    return el if el is not None else text
+
+
+def _append_inline(parent, item) -> None:
+    """Append a string or element at the end of parent's content."""
+    if isinstance(item, str):
+        if len(parent):
+            parent[-1].tail = (parent[-1].tail or "") + item
+        else:
+            parent.text = (parent.text or "") + item
+    else:
+        parent.append(item)
+
+
+def pdf_to_xhtml_fast(
+    pdf_path: Path, out_xhtml: Path, writer: str = "tree", compact: bool = False
+) -> Tuple[bool, Optional[str]]:
+    """
+    Direct PDF -> XHTML for simple, text-layer PDFs (see triage_pdf).
+    Each PyMuPDF text block becomes a <p> with <br/> between its lines, which is
+    what the pdf2docx + mammoth path yields for the same plain layouts.
+    """
+    try:
+        ensure_dir(out_xhtml.parent)
+        div = lxml_html.Element("div")
+        with fitz.open(str(pdf_path)) as doc:
+            for page in doc:
+                for block in page.get_text("dict", sort=True)["blocks"]:
+                    if block.get("type") != 0:
+                        continue
+                    p = lxml_html.Element("p")
+                    for i, line in enumerate(block["lines"]):
+                        if i:
+                            _append_inline(p, " ")
+                            p.append(lxml_html.Element("br"))
+                        for span in line["spans"]:
+                            _append_inline(p, _span_element(span))
+                    if p.text or len(p):
+                        div.append(p)
+        write_xhtml(div, out_xhtml, writer, compact)
         return True, None
     except Exception as e:
-        return False, f"docx_to_xhtml failed: {e}"
+        return False, f"pdf_to_xhtml failed: {e}"
+
+
+# -------- Conversion cache --------
+
+def _package_version(name: str) -> str:
+    try:
+        return importlib_metadata.version(name)
+    except Exception:
+        return "unknown"
+
+
+# Bump XHTML_WRITER_VERSION whenever docx_to_xhtml output changes, so cached
+# XHTML produced by older code is not reused.
+XHTML_WRITER_VERSION = "2"
+PDF_CONVERTER_VERSION = f"pdf2docx={_package_version('pdf2docx')}"
+FAST_PATH_VERSION = f"pymupdf={_package_version('pymupdf')};writer={XHTML_WRITER_VERSION}"
+XHTML_CONVERTER_VERSION = (
+    f"mammoth={_package_version('mammoth')};lxml={_package_version('lxml')};writer={XHTML_WRITER_VERSION}"
+)
+
+
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    """sha256 of a file's content, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ConversionCache:
+    """
+    Persistent, content-addressed store of conversion outputs.
+
+    Entries are keyed by the sha256 of the *source* file plus the stage and the
+    versions of the converters involved, so an unchanged file is never converted
+    twice, whichever case folder (or run) it turns up in. Layout:
+        <root>/<key[:2]>/<key><ext>
+    Writes go through a temp file + os.replace, so concurrent workers never see
+    partial entries.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    @staticmethod
+    def key(digest: str, stage: str, version: str) -> str:
+        return hashlib.sha256(f"{digest}|{stage}|{version}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str, ext: str) -> Path:
+        return self.root / key[:2] / f"{key}{ext}"
+
+    def has(self, key: str, ext: str) -> bool:
+        return self.path_for(key, ext).is_file()
+
+    def fetch(
+        self, key: str, ext: str, out_path: Path, methods: Tuple[str, ...] = PLACE_COPY
+    ) -> Optional[str]:
+        """Place a cached entry at out_path. Returns the placement method, or None on a miss."""
+        entry = self.path_for(key, ext)
+        if not entry.is_file():
+            return None
+        try:
+            return place_file(entry, out_path, methods)
+        except OSError:
+            return None
+
+    def store(
+        self, key: str, ext: str, produced: Path, methods: Tuple[str, ...] = PLACE_COPY
+    ) -> None:
+        """Add a freshly converted file to the cache. Failures are not fatal."""
+        entry = self.path_for(key, ext)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            ensure_dir(entry.parent)
+            place_file(produced, tmp, methods)
+            os.replace(tmp, entry)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def store_bytes(self, key: str, ext: str, data: bytes) -> None:
+        """Add a conversion result that only exists in memory. Failures are not fatal."""
+        entry = self.path_for(key, ext)
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            ensure_dir(entry.parent)
+            tmp.write_bytes(data)
+            os.replace(tmp, entry)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    def fetch_assets(self, key: str, assets_dir: Path, methods: Tuple[str, ...] = PLACE_COPY) -> Optional[Dict]:
+        """
+        Restore the extracted images of a cached XHTML into assets_dir and return
+        its image manifest fields, or None if the entry or any image is missing.
+        """
+        try:
+            stats = json.loads(self.path_for(key, ".assets.json").read_text(encoding="utf-8"))
+            place_assets(asset_names(stats), self.root / ASSETS_DIR, assets_dir, methods)
+            return stats
+        except (OSError, ValueError):
+            return None
+
+    def store_assets(self, key: str, assets_dir: Path, stats: Dict, methods: Tuple[str, ...] = PLACE_COPY) -> None:
+        """Keep the images (shared, content-addressed) and image fields of a cached XHTML."""
+        entry = self.path_for(key, ".assets.json")
+        tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        try:
+            place_assets(asset_names(stats), assets_dir, self.root / ASSETS_DIR, methods)
+            ensure_dir(entry.parent)
+            tmp.write_text(json.dumps(stats), encoding="utf-8")
+            os.replace(tmp, entry)
+        except OSError:
+            pass
+
+
+def cached_convert(
+    cache: Optional[ConversionCache],
+    key: Optional[str],
+    out_path: Path,
+    convert: Callable[[], Tuple[bool, Optional[str]]],
+    methods: Tuple[str, ...] = PLACE_COPY,
+    companions: Tuple[str, ...] = (),
+) -> Tuple[bool, Optional[str], Dict]:
+    """
+    Run convert() unless the cache already holds out_path's content for key.
+    companions are the suffixes of files convert() writes next to out_path
+    (<stem><suffix>, e.g. the XHTML text index); they are cached with it, and
+    a hit needs all of them.
+    Returns (ok, error, info) where info holds the manifest fields to record:
+    "cache" ("hit" / "miss") and, on a hit, the placement "method".
+    """
+    if cache is None or key is None:
+        ok, err = convert()
+        return ok, err, {"cache": ""}
+    outputs = [(out_path.suffix, out_path)] + [(ext, out_path.with_name(f"{out_path.stem}{ext}")) for ext in companions]
+    if all(cache.has(key, ext) for ext, _ in outputs):
+        methods_used = [cache.fetch(key, ext, path, methods) for ext, path in outputs]
+        if all(methods_used):
+            return True, None, {"cache": "hit", "method": methods_used[0]}
+    # Never write a conversion through a link left by an earlier placement
+    for _, path in outputs:
+        if path.exists():
+            path.unlink()
+    ok, err = convert()
+    if ok:
+        # The main output goes last: a concurrent reader that sees it also sees its companions
+        for ext, path in outputs[::-1]:
+            cache.store(key, ext, path, methods)
+    return ok, err, {"cache": "miss"}
+
+
+def cached_convert_bytes(
+    cache: Optional[ConversionCache],
+    key: Optional[str],
+    ext: str,
+    convert: Callable[[], Tuple[bool, Optional[str], bytes]],
+) -> Tuple[bool, Optional[str], bytes, Dict]:
+    """
+    cached_convert for a conversion whose output stays in memory: a hit reads
+    the cache entry, a miss runs convert() and stores the bytes it returns.
+    Returns (ok, error, data, info), info as for cached_convert.
+    """
+    if cache is None or key is None:
+        ok, err, data = convert()
+        return ok, err, data, {"cache": ""}
+    try:
+        return True, None, cache.path_for(key, ext).read_bytes(), {"cache": "hit"}
+    except OSError:
+        pass
+    ok, err, data = convert()
+    if ok:
+        cache.store_bytes(key, ext, data)
+    return ok, err, data, {"cache": "miss"}
+
+
+# -------- Metrics --------
+
+T = TypeVar("T")
+
+# Action metric columns, in manifest order
+METRIC_FIELDS = ("wall_s", "cpu_s", "in_bytes", "out_bytes", "pages", "peak_rss_mb")
+
+
+def _reset_peak_rss() -> None:
+    """Reset this process's VmHWM (Linux); elsewhere peak RSS stays a lifetime peak."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus its waited-for children (e.g. split page-range workers)."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def measure(fn: Callable[[], T]) -> Tuple[T, Dict]:
+    """Run fn() and return its result with "wall_s", "cpu_s" and "peak_rss_mb" of the call."""
+    _reset_peak_rss()
+    cpu0, t0 = _cpu_seconds(), time.perf_counter()
+    result = fn()
+    wall, cpu = time.perf_counter() - t0, _cpu_seconds() - cpu0
+    return result, {"wall_s": round(wall, 4), "cpu_s": round(cpu, 4), "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def file_size(path: Path) -> Union[int, str]:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return ""
+
+
+def docx_page_count(docx_path: Path) -> Union[int, str]:
+    """Page count saved by Word in docProps/app.xml, if any (it is not recomputed here)."""
+    try:
+        with zipfile.ZipFile(docx_path) as z:
+            m = re.search(rb"<Pages>(\d+)</Pages>", z.read("docProps/app.xml"))
+        return int(m.group(1)) if m else ""
+    except (OSError, KeyError, zipfile.BadZipFile):
+        return ""
+
+
+def action_metrics(src: Path, out: Path, ok: bool, timing: Dict, pages: Union[int, str] = "") -> Dict:
+    """Manifest metric fields (METRIC_FIELDS) for one action."""
+    return {
+        "wall_s": timing["wall_s"],
+        "cpu_s": timing["cpu_s"],
+        "in_bytes": file_size(src),
+        "out_bytes": file_size(out) if ok else "",
+        "pages": pages,
+        "peak_rss_mb": timing["peak_rss_mb"],
+    }
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def print_metrics_report(manifest_rows: List[Dict], run_id: Optional[str] = None, slowest: int = 10) -> None:
+    """
+    Print throughput per stage and the slowest source files (by wall time) of this
+    manifest. With run_id, only the work of that run counts: rows kept from earlier
+    runs (cases skipped by --resume) and reused conversions are left out.
+    """
+    stages: Dict[str, Dict[str, float]] = {}
+    timed_rows = [
+        r for r in manifest_rows
+        if r.get("wall_s") not in (None, "") and not r.get("resumed") and run_id in (None, r.get("_run"))
+    ]
+    for row in timed_rows:
+        st = stages.setdefault(row["action"], {"n": 0, "wall": 0.0, "cpu": 0.0, "bytes": 0.0, "pages": 0.0})
+        st["n"] += 1
+        st["wall"] += _as_float(row["wall_s"])
+        st["cpu"] += _as_float(row.get("cpu_s"))
+        st["bytes"] += _as_float(row.get("in_bytes"))
+        st["pages"] += _as_float(row.get("pages"))
+    if not stages:
+        return
+    print("\nStage throughput (this run):")
+    print(f"  {'action':<12}{'files':>7}{'wall s':>10}{'cpu s':>10}{'files/s':>9}{'MB/s':>9}{'pages/s':>9}")
+    for action in sorted(stages, key=lambda a: ACTION_ORDER.get(a, 0)):
+        st = stages[action]
+        wall = st["wall"]
+
+        def rate(amount: float) -> str:
+            return f"{amount / wall:.1f}" if amount and wall else "-"
+
+        print(f"  {action:<12}{int(st['n']):>7}{st['wall']:>10.2f}{st['cpu']:>10.2f}"
+              f"{rate(st['n']):>9}{rate(st['bytes'] / 1e6):>9}{rate(st['pages']):>9}")
+    conv = [r for r in timed_rows if r["action"] in CONVERSION_ACTIONS]
+    conv.sort(key=lambda r: _as_float(r["wall_s"]), reverse=True)
+    if conv and slowest > 0:
+        print(f"\nSlowest conversions (top {min(slowest, len(conv))}):")
+        for row in conv[:slowest]:
+            print(f"  {_as_float(row['wall_s']):8.2f}s  {row['action']:<12} pages={row.get('pages') or '?':<5} "
+                  f"rss={row.get('peak_rss_mb') or '?'}MB  QID {row['qid']}: {row['source_file']}")
+    killed = [r for r in timed_rows if r.get("status") in ("timeout", "oom")]
+    if killed:
+        print(f"\nKilled conversions ({len(killed)}):")
+        for row in killed:
+            print(f"  {row['status']:<8} {row['action']:<12} QID {row['qid']}: {row['source_file']} ({row['error']})")
+
+
+# -------- Sandboxed conversions --------
+
+# How often the supervisor checks a running conversion against its limits
+SANDBOX_POLL_S = 0.1
+
+
+@dataclass(frozen=True)
+class SandboxLimits:
+    """Limits for one conversion in a sandbox worker; 0 = unlimited."""
+    max_rss_mb: int = 0
+    timeout_s: float = 0.0
+
+
+def _tree_rss_mb(pid: int) -> float:
+    """Resident memory of pid and all its descendants (Linux /proc; 0 elsewhere)."""
+    total_kb, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f"/proc/{p}/task"):
+                with open(f"/proc/{p}/task/{task}/children") as f:
+                    stack.extend(int(c) for c in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+def _sandbox_main(conn) -> None:
+    """Sandbox worker loop: run (fn, args) requests until the supervisor closes the pipe."""
+    # Own process group, so that a kill also takes converter subprocesses (split page ranges)
+    os.setpgrp()
+    _SANDBOXES.clear()
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        _reset_peak_rss()
+        cpu0 = _cpu_seconds()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            # Converters catch their own errors; this is e.g. a MemoryError
+            result = (False, f"{fn.__name__} failed: {e!r}")
+        conn.send((result, {"cpu_s": round(_cpu_seconds() - cpu0, 4), "peak_rss_mb": round(_peak_rss_mb(), 1)}))
+
+
+class Sandbox:
+    """
+    A supervised worker subprocess that runs one conversion at a time under
+    SandboxLimits. The supervisor polls the worker's wall time and the RSS of
+    its process tree; on a breach the tree is killed (SIGKILL) and a fresh
+    worker is started for the next conversion. A worker that dies on its own
+    (e.g. a segfault in a native library) is restarted the same way.
+    """
+
+    def __init__(self, limits: SandboxLimits):
+        self.limits = limits
+        self.owner_pid = os.getpid()
+        self.proc = None
+        self.conn = None
+        self.restarts = 0
+        # Close the pipe before multiprocessing joins children at exit (worker exits on EOF)
+        multiprocessing.util.Finalize(self, self.close, exitpriority=10)
+
+    def _start(self) -> None:
+        if self.proc is not None:
+            self.restarts += 1
+        parent_conn, child_conn = multiprocessing.Pipe()
+        # Not a daemon: the worker may need its own pool for split PDFs
+        self.proc = multiprocessing.Process(target=_sandbox_main, args=(child_conn,), daemon=False)
+        self.proc.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def _kill(self) -> None:
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except OSError:
+            self.proc.kill()
+        self.proc.join()
+        self.conn.close()
+        self.conn = None
+
+    def close(self) -> None:
+        if os.getpid() != self.owner_pid or self.proc is None:
+            return
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.proc.join(5)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+
+    def call(self, fn: Callable, *args) -> Tuple[Optional[object], Dict]:
+        """
+        Run fn(*args) in the worker. Returns (result, info): info has the
+        worker's "cpu_s" and "peak_rss_mb", and on failure result is None and
+        info also has "status" ("timeout", "oom" or "error") and "error".
+        """
+        if self.conn is None or not self.proc.is_alive():
+            self._start()
+        max_rss, timeout = self.limits.max_rss_mb, self.limits.timeout_s
+        started, peak = time.monotonic(), 0.0
+        self.conn.send((fn, args))
+        while True:
+            if self.conn.poll(SANDBOX_POLL_S):
+                try:
+                    result, info = self.conn.recv()
+                except (EOFError, OSError):
+                    result = None
+                if result is not None:
+                    info["peak_rss_mb"] = round(max(info["peak_rss_mb"], peak), 1)
+                    return result, info
+            if not self.proc.is_alive():
+                self.proc.join()
+                code = self.proc.exitcode
+                self.conn.close()
+                self.conn = None
+                cause = f"signal {-code}" if code and code < 0 else f"exit code {code}"
+                return None, {"status": "error", "error": f"conversion worker died ({cause})",
+                              "peak_rss_mb": round(peak, 1)}
+            rss = _tree_rss_mb(self.proc.pid) if max_rss else 0.0
+            peak = max(peak, rss)
+            if max_rss and rss > max_rss:
+                self._kill()
+                return None, {"status": "oom", "error": f"killed: RSS {rss:.0f} MB over the {max_rss} MB limit",
+                              "peak_rss_mb": round(peak, 1)}
+            if timeout and time.monotonic() - started > timeout:
+                self._kill()
+                return None, {"status": "timeout", "error": f"killed: no result after {timeout:g}s",
+                              "peak_rss_mb": round(peak, 1)}
+
+
+# One sandbox per (process, limits); pool workers each supervise their own
+_SANDBOXES: Dict[SandboxLimits, Sandbox] = {}
+
+
+def sandbox_for(limits: SandboxLimits) -> Sandbox:
+    box = _SANDBOXES.get(limits)
+    if box is None or box.owner_pid != os.getpid():
+        box = _SANDBOXES[limits] = Sandbox(limits)
+    return box
+
+
+def run_converter(
+    limits: Optional[SandboxLimits],
+    info: Dict,
+    out_path: Path,
+    fn: Callable,
+    *args,
+) -> Tuple[bool, Optional[str]]:
+    """
+    Call converter fn(*args) -> (ok, error), in a sandbox if limits are set.
+    Sandbox details go into info: the worker's "cpu_s" / "peak_rss_mb", a
+    "status" on a breach or crash, and any third element of fn's result
+    (e.g. image stats) as "result_extra". Partial output of a killed
+    conversion is removed.
+    """
+    if limits is None:
+        return fn(*args)
+    result, sandbox_info = sandbox_for(limits).call(fn, *args)
+    info.update(sandbox_info)
+    if result is None:
+        try:
+            out_path.unlink()
+        except OSError:
+            pass
+        return False, sandbox_info["error"]
+    if len(result) > 2:
+        info["result_extra"] = result[2]
+    return result[0], result[1]
+
+
+def _docx_to_xhtml_collect(
+    docx_path: Union[Path, bytes],
+    out_xhtml: Path,
+    assets_dir: Optional[Path],
+    writer: str = "tree",
+    compact: bool = False,
+    engine: str = "mammoth",
+) -> Tuple[bool, Optional[str], Dict]:
+    """docx_to_xhtml returning its image / engine stats, for running in a sandbox worker."""
+    stats: Dict = {}
+    ok, err = docx_to_xhtml(docx_path, out_xhtml, assets_dir, stats, writer, compact, engine)
+    return ok, err, stats
+
+
+def conversion_status(ok: bool, info: Dict) -> str:
+    """Manifest status of a conversion: "ok", or "timeout" / "oom" / "error"."""
+    return "ok" if ok else info.get("status", "error")
+
+
+def worker_timing(timing: Dict, info: Dict) -> Dict:
+    """
+    measure() timing with CPU and peak RSS taken from the sandbox worker when
+    there was one: the supervisor itself only waits on the pipe.
+    """
+    return {**timing, **{k: info[k] for k in ("cpu_s", "peak_rss_mb") if k in info}}
 
 
 # -------- Core processing --------
 
+@dataclass(frozen=True)
+class ConversionOptions:
+    """Per-run conversion settings; pickled into pool workers with each job."""
+    cache: Optional[ConversionCache] = None
+    # Run each conversion in a supervised worker subprocess under these limits (None = in-process)
+    sandbox: Optional[SandboxLimits] = None
+    # PDFs with at least this many pages are parsed as parallel page ranges (0 = never)
+    split_pages: int = 0
+    split_workers: int = 4
+    # Triage PDFs and send simple text-layer ones straight to XHTML (no DOCX)
+    fast_path: bool = False
+    # "copy": convert under .work, then copy into QID folders (original behaviour)
+    # "direct": convert straight into QID folders; link source DOCX and cache hits
+    placement: str = "copy"
+    # "inline": images as base64 data URIs (mammoth default)
+    # "extract": images written once into an assets/ folder next to the XHTML
+    images: str = "inline"
+    # XHTML serialization: "tree" (whole document at once) or "stream" (etree.xmlfile),
+    # pretty-printed unless compact_xhtml
+    xhtml_writer: str = "tree"
+    compact_xhtml: bool = False
+    # "disk": docx->xhtml reads the DOCX generated from a PDF back from disk
+    # "memory": pdf->docx hands its bytes to docx->xhtml (the file is still written once)
+    docx_handoff: str = "disk"
+    # Write DOCX generated from PDFs at all; without it they only exist in memory (and the cache)
+    keep_pdf_docx: bool = True
+    # DOCX->XHTML: "mammoth", or "native" (docx_stream, streamed; mammoth for what it can't handle)
+    docx_engine: str = "mammoth"
+
+    @property
+    def docx_in_memory(self) -> bool:
+        return self.docx_handoff == "memory" or not self.keep_pdf_docx
+
+    @property
+    def xhtml_format(self) -> str:
+        """Cache-version suffix of the XHTML serialization ("" for the default pretty tree output)."""
+        if self.xhtml_writer == "tree" and not self.compact_xhtml:
+            return ""
+        return f";xhtml={self.xhtml_writer}{',compact' if self.compact_xhtml else ''}"
+
+    @property
+    def place_methods(self) -> Tuple[str, ...]:
+        return PLACE_LINK if self.placement == "direct" else PLACE_COPY
+
+
+def manifest_row(
+    qid: str,
+    case_name: str,
+    action: str,
+    source_file: str = "",
+    output_file: str = "",
+    status: str = "ok",
+    error: str = "",
+    **extra,
+) -> Dict:
+    return {
+        "qid": qid,
+        "case_name": case_name,
+        "source_file": source_file,
+        "action": action,
+        "output_file": output_file,
+        "status": status,
+        "error": error,
+        **extra,
+    }
+
+
+def list_case_files(case_dir: Path) -> Tuple[List[Path], List[Path]]:
+    """
+    Return (pdfs, docxs) found under case_dir, sorted so that the work plan (and
+    therefore the manifest) does not depend on directory listing order.
+    """
+    pdfs = sorted(case_dir.rglob("*.pdf"))
+    docxs = sorted(case_dir.rglob("*.docx"))
+    return pdfs, docxs
+
+
+def convert_source_file(
+    src: Path,
+    out_dir: Path,
+    options: ConversionOptions = ConversionOptions(),
+) -> List[Dict]:
+    """
+    Convert a single case file, writing outputs into out_dir:
+      - .pdf  -> .docx -> .xhtml  (or .pdf -> .xhtml on the fast path)
+      - .docx -> .xhtml
+    Returns one partial manifest row (no qid/case_name) per action attempted.
+    Never raises, so it is safe to run as an independent process-pool job.
+    Every row carries the action's metrics (METRIC_FIELDS; see measure()).
+
+    With a cache, both outputs are looked up by the content hash of src (for a
+    PDF the XHTML is keyed by the PDF too, since regenerated DOCX bytes differ
+    from run to run), and each row records "cache": "hit" / "miss".
+
+    PDFs at or above options.split_pages pages are converted as parallel page
+    ranges; their row records the number of ranges in "page_ranges".
+
+    With options.fast_path, PDFs are triaged first: simple ones get a single
+    "pdf->xhtml" row (path "fast"), the rest go through pdf2docx (path "full"),
+    with the triage reason recorded either way.
+
+    The two steps are also available separately (convert_pdf_stage, then
+    convert_xhtml_stage on its hand-off) for the staged pipeline. With
+    options.docx_in_memory the hand-off carries the generated DOCX bytes
+    (rows record "handoff": "memory", or "memory-only" when the DOCX is not
+    written at all and so has no output file and is not copied).
+    """
+    if src.suffix.lower() == ".pdf":
+        rows, handoff = convert_pdf_stage(src, out_dir, options)
+    else:
+        rows, handoff = [], docx_handoff(src)
+    if handoff is not None:
+        rows += convert_xhtml_stage(handoff, out_dir, options)
+    return rows
+
+
+def docx_handoff(src: Path) -> Dict:
+    """Hand-off for converting an original DOCX (its digest and page count are filled in lazily)."""
+    return {"src": src, "docx": src, "digest": None, "xhtml_version": XHTML_CONVERTER_VERSION, "pages": None,
+            "docx_bytes": None, "handoff": ""}
+
+
+def convert_pdf_stage(
+    src: Path,
+    out_dir: Path,
+    options: ConversionOptions = ConversionOptions(),
+) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    First step of convert_source_file for a PDF: pdf->docx, or pdf->xhtml on the
+    fast path. Returns its rows and, if a DOCX was produced, the hand-off for
+    convert_xhtml_stage (None otherwise). Never raises.
+    """
+    rows: List[Dict] = []
+    action = "pdf->docx"
+    cache = options.cache
+    methods = options.place_methods
+    try:
+        digest = file_digest(src) if cache is not None else None
+        try:
+            pages: Union[int, str] = pdf_page_count(src)
+        except Exception:
+            pages = ""  # let the converter report the broken PDF
+        path_info: Dict = {}
+        if options.fast_path:
+            fast_version = FAST_PATH_VERSION + options.xhtml_format
+            fast_key = ConversionCache.key(digest, "pdf->xhtml", fast_version) if digest else None
+            full_key = ConversionCache.key(digest, "pdf->docx", PDF_CONVERTER_VERSION) if digest else None
+            # A cached result already tells us which way this content went
+            if fast_key and cache.has(fast_key, ".xhtml"):
+                simple, reason = True, "cached"
+            elif full_key and cache.has(full_key, ".docx"):
+                simple, reason = False, "cached"
+            else:
+                simple, reason = triage_pdf(src)
+            path_info = {"path": "fast" if simple else "full", "triage": reason}
+            if simple:
+                action = "pdf->xhtml"
+                out_xhtml = out_dir / f"{sanitize_filename(src.stem)}.xhtml"
+                worker: Dict = {}
+                (ok, err, info), timing = measure(lambda: cached_convert(
+                    cache, fast_key, out_xhtml,
+                    lambda: run_converter(options.sandbox, worker, out_xhtml, pdf_to_xhtml_fast,
+                                         src, out_xhtml, options.xhtml_writer, options.compact_xhtml),
+                    methods, (INDEX_SUFFIX,),
+                ))
+                rows.append(manifest_row(
+                    "", "", action, str(src),
+                    str(out_xhtml) if ok else "", conversion_status(ok, worker), err or "",
+                    **info, **path_info, **action_metrics(src, out_xhtml, ok, worker_timing(timing, worker), pages),
+                ))
+                return rows, None
+
+        action = "pdf->docx"
+        out_docx = out_dir / f"{sanitize_filename(src.stem)}.docx"
+        key = ConversionCache.key(digest, action, PDF_CONVERTER_VERSION) if digest else None
+        extra: Dict = {}
+        worker: Dict = {}
+        split = options.split_workers > 1 and pages and 0 < options.split_pages <= pages
+        handed: Dict[str, bytes] = {}
+
+        def convert_bytes() -> Tuple[bool, Optional[str], bytes]:
+            workers = 1
+            if split:
+                extra["page_ranges"] = len(split_page_ranges(pages, options.split_workers))
+                workers = options.split_workers
+            if options.sandbox is None:
+                return pdf_to_docx_bytes(src, pages or 0, workers)
+            # The worker's DOCX bytes come back with its result
+            ok, err = run_converter(options.sandbox, worker, out_docx, pdf_to_docx_bytes, src, pages or 0, workers)
+            return ok, err, worker.pop("result_extra", b"")
+
+        def convert() -> Tuple[bool, Optional[str]]:
+            if options.docx_in_memory:
+                ok, err, data = convert_bytes()
+                if ok:
+                    ensure_dir(out_docx.parent)
+                    out_docx.write_bytes(data)
+                    handed["docx"] = data
+                return ok, err
+            if split:
+                extra["page_ranges"] = len(split_page_ranges(pages, options.split_workers))
+                return run_converter(options.sandbox, worker, out_docx,
+                                     pdf_to_docx_split, src, out_docx, pages, options.split_workers)
+            return run_converter(options.sandbox, worker, out_docx, pdf_to_docx, src, out_docx)
+
+        if options.keep_pdf_docx:
+            (ok, err, info), timing = measure(lambda: cached_convert(cache, key, out_docx, convert, methods))
+            # A cache hit was placed at out_docx; docx->xhtml reads it from there
+            docx_bytes = handed.get("docx")
+            handoff_mode = "memory" if docx_bytes is not None else ""
+        else:
+            (ok, err, docx_bytes, info), timing = measure(
+                lambda: cached_convert_bytes(cache, key, ".docx", convert_bytes)
+            )
+            handoff_mode = "memory-only"
+        metrics = action_metrics(src, out_docx, ok, worker_timing(timing, worker), pages)
+        if handoff_mode == "memory-only" and ok:
+            metrics["out_bytes"] = len(docx_bytes)
+        rows.append(manifest_row(
+            "", "", action, str(src),
+            str(out_docx) if ok and options.keep_pdf_docx else "", conversion_status(ok, worker), err or "",
+            **info, **extra, **path_info, **({"handoff": handoff_mode} if handoff_mode else {}), **metrics,
+        ))
+        if not ok:
+            return rows, None
+        return rows, {
+            "src": src,
+            "docx": out_docx,
+            "digest": digest,
+            "xhtml_version": f"{PDF_CONVERTER_VERSION};{XHTML_CONVERTER_VERSION}",
+            "pages": pages,
+            "docx_bytes": docx_bytes,
+            "handoff": handoff_mode,
+        }
+    except Exception as e:
+        # Anything the converters did not catch themselves (e.g. an unreadable path)
+        rows.append(manifest_row("", "", action, str(src), "", "error", str(e)))
+        return rows, None
+
+
+def convert_xhtml_stage(
+    handoff: Dict,
+    out_dir: Path,
+    options: ConversionOptions = ConversionOptions(),
+) -> List[Dict]:
+    """
+    Second step of convert_source_file: docx->xhtml for an original DOCX
+    (docx_handoff) or the DOCX produced by convert_pdf_stage, read from the
+    hand-off's "docx_bytes" when it was passed in memory. Never raises.
+    """
+    rows: List[Dict] = []
+    current: Path = handoff["docx"]
+    docx_bytes: Optional[bytes] = handoff["docx_bytes"]
+    docx_in = current if docx_bytes is None else docx_bytes
+    cache = options.cache
+    methods = options.place_methods
+    try:
+        digest = handoff["digest"]
+        if digest is None and cache is not None:
+            digest = file_digest(handoff["src"])
+        docx_pages = handoff["pages"]
+        if docx_pages is None:
+            docx_pages = docx_page_count(current)
+        xhtml_version = handoff["xhtml_version"] + options.xhtml_format
+
+        out_xhtml = out_dir / f"{sanitize_filename(current.stem)}.xhtml"
+        assets_dir = out_dir / ASSETS_DIR if options.images == "extract" else None
+        image_stats: Dict = {}
+        if assets_dir is not None:
+            xhtml_version += ";images=extract"
+        if options.docx_engine == "native":
+            xhtml_version += f";engine=native{NATIVE_DOCX_VERSION}"
+        key = ConversionCache.key(digest, "xhtml", xhtml_version) if digest else None
+        if assets_dir is not None and key and cache.has(key, ".xhtml"):
+            # A cached XHTML is only usable together with its images
+            cached_stats = cache.fetch_assets(key, assets_dir, methods)
+            if cached_stats is None:
+                key = None
+            else:
+                image_stats = cached_stats
+        worker: Dict = {}
+
+        def convert() -> Tuple[bool, Optional[str]]:
+            if options.sandbox is None:
+                return docx_to_xhtml(docx_in, out_xhtml, assets_dir, image_stats,
+                                     options.xhtml_writer, options.compact_xhtml, options.docx_engine)
+            # The worker's image stats come back with its result
+            result = run_converter(options.sandbox, worker, out_xhtml,
+                                   _docx_to_xhtml_collect, docx_in, out_xhtml, assets_dir,
+                                   options.xhtml_writer, options.compact_xhtml, options.docx_engine)
+            image_stats.update(worker.pop("result_extra", {}))
+            return result
+
+        (ok, err, info), timing = measure(lambda: cached_convert(
+            cache, key, out_xhtml, convert, methods, (INDEX_SUFFIX,)
+        ))
+        if ok and assets_dir is not None and info["cache"] == "miss":
+            cache.store_assets(key, assets_dir, image_stats, methods)
+        metrics = action_metrics(current, out_xhtml, ok, worker_timing(timing, worker), docx_pages)
+        if docx_bytes is not None:
+            metrics["in_bytes"] = len(docx_bytes)
+        rows.append(manifest_row(
+            "", "", "docx->xhtml", str(current),
+            str(out_xhtml) if ok else "", conversion_status(ok, worker), err or "",
+            **info, **({"handoff": handoff["handoff"]} if handoff["handoff"] else {}), **image_stats, **metrics,
+        ))
+    except Exception as e:
+        # Anything the converters did not catch themselves (e.g. an unreadable path)
+        rows.append(manifest_row("", "", "docx->xhtml", str(current), "", "error", str(e)))
+    return rows
+
+
+def record_rows(
+    rows: List[Dict],
+    qid: str,
+    case_name: str,
+    src_idx: int,
+    origin: Path,
+    manifest: ManifestSink,
+) -> None:
+    """Tag the conversion rows of one source file with their case and record them."""
+    for row in rows:
+        row.update(qid=qid, case_name=case_name, _src=src_idx, _origin=str(origin))
+        manifest.append(row)
+
+
+# (source, _src index, action, extension, asset names) of one output to place
+CopyTask = Tuple[Path, int, str, str, List[str]]
+
+
+def plan_copies(conv_rows: List[Dict]) -> List[CopyTask]:
+    """The outputs to place into the QID folder for these (recorded) conversion rows, in placement order."""
+    conv_rows = sorted(conv_rows, key=lambda r: (ACTION_ORDER[r["action"]], r["_src"]))
+
+    # We copy original DOCX if it exists, otherwise the generated one. Every DOCX
+    # that was fed to docx->xhtml is one of those (originals first, then generated),
+    # except generated ones that were only handed over in memory (--no-pdf-docx).
+    docx_to_copy: Dict[Path, int] = {}
+    xhtml_to_copy: List[Tuple[Path, int, List[str]]] = []
+    for row in conv_rows:
+        if row["action"] == "docx->xhtml" and row.get("handoff") != "memory-only":
+            docx_to_copy.setdefault(Path(row["source_file"]), row["_src"])
+        if row["action"] in ("docx->xhtml", "pdf->xhtml") and row["status"] == "ok":
+            xhtml_to_copy.append((Path(row["output_file"]), row["_src"], asset_names(row)))
+
+    copies: List[CopyTask] = [(src, idx, "copy-docx", ".docx", []) for src, idx in docx_to_copy.items()]
+    copies += [(src, idx, "copy-xhtml", ".xhtml", assets) for src, idx, assets in xhtml_to_copy]
+    return copies
+
+
+def place_output(
+    qid: str,
+    case_name: str,
+    copy: CopyTask,
+    dest_qid_dir: Path,
+    methods: Tuple[str, ...] = PLACE_COPY,
+) -> Dict:
+    """
+    Place one output (and, for an XHTML, its assets and text index) into
+    dest_qid_dir; returns its copy row. Never raises.
+    """
+    src, idx, action, ext, assets = copy
+    dst = dest_qid_dir / f"{sanitize_filename(src.stem)}{ext}"
+
+    def place() -> str:
+        place_assets(assets, src.parent / ASSETS_DIR, dest_qid_dir / ASSETS_DIR, methods)
+        if action == "copy-xhtml":
+            place_file(index_path(src), index_path(dst), methods)
+        return place_file(src, dst, methods)
+
+    try:
+        method, timing = measure(place)
+        return manifest_row(
+            qid, case_name, action, str(src), str(dst), method=method, _src=idx,
+            **action_metrics(src, dst, True, timing),
+        )
+    except Exception as e:
+        return manifest_row(qid, case_name, action, str(src), str(dst), "error", str(e), _src=idx)
+
+
+def place_outputs(
+    qid: str,
+    case_name: str,
+    copies: List[CopyTask],
+    dest_qid_dir: Path,
+    methods: Tuple[str, ...] = PLACE_COPY,
+) -> List[Dict]:
+    """place_output for each of copies, in order."""
+    return [place_output(qid, case_name, copy, dest_qid_dir, methods) for copy in copies]
+
+
+def finish_case(
+    qid: str,
+    case_name: str,
+    converted: List[List[Dict]],
+    dest_qid_dir: Path,
+    manifest: ManifestSink,
+    methods: Tuple[str, ...] = PLACE_COPY,
+    shared: Iterable[Dict] = (),
+) -> None:
+    """
+    Copy the DOCX + XHTML of a case into dest_qid_dir with safe filenames, given
+    the (already recorded) conversion rows of each source file in plan order.
+    Each copy row records the placement "method"; outputs converted directly
+    into dest_qid_dir are "in-place". Extracted images of each XHTML go into
+    dest_qid_dir/assets along with it. Ends with a case-done marker, which
+    --resume uses to skip finished cases. The same outputs then go to the
+    QIDs sharing the case folder (see place_shared).
+    """
+    ensure_dir(dest_qid_dir)
+
+    conv_rows = [row for rows in converted for row in rows]
+    conv_ok = all(row["status"] == "ok" for row in conv_rows)
+    all_ok = conv_ok
+    copies = plan_copies(conv_rows)
+    for row in place_outputs(qid, case_name, copies, dest_qid_dir, methods):
+        all_ok = all_ok and row["status"] == "ok"
+        manifest.append(row)
+
+    manifest.append(manifest_row(qid, case_name, CASE_DONE, status="ok" if all_ok else "error"))
+    place_shared(qid, shared, copies, conv_ok, manifest, methods)
+
+
+def share_case_jobs(jobs: List[Dict]) -> List[Dict]:
+    """
+    Plan-level deduplication: Excel rows (e.g. several questions about one case)
+    whose case name resolved to the same folder are converted once. Each group
+    becomes its first job, with job["shared"] listing the qid / case_name /
+    dest_qid_dir of the others; their outputs are placed by place_shared.
+    """
+    planned: Dict[Path, Dict] = {}
+    for job in jobs:
+        first = planned.get(job["case_dir"])
+        if first is None:
+            planned[job["case_dir"]] = dict(job, shared=[])
+            continue
+        keys = [(first["qid"], first["case_name"]), *((s["qid"], s["case_name"]) for s in first["shared"])]
+        if (job["qid"], job["case_name"]) not in keys:
+            first["shared"].append({k: job[k] for k in ("qid", "case_name", "dest_qid_dir")})
+    return list(planned.values())
+
+
+def place_shared(
+    qid: str,
+    shared: Iterable[Dict],
+    copies: List[CopyTask],
+    conv_ok: bool,
+    manifest: ManifestSink,
+    methods: Tuple[str, ...] = PLACE_COPY,
+) -> None:
+    """
+    Fan the outputs of qid's case out to the QIDs sharing its case folder (see
+    share_case_jobs): each gets the same copies, as copy rows marked
+    shared_from=qid, and its own case-done marker. Its status also reflects
+    the shared conversions (conv_ok).
+    """
+    for share in shared:
+        ensure_dir(share["dest_qid_dir"])
+        all_ok = conv_ok
+        for row in place_outputs(share["qid"], share["case_name"], copies, share["dest_qid_dir"], methods):
+            row["shared_from"] = qid
+            all_ok = all_ok and row["status"] == "ok"
+            manifest.append(row)
+        manifest.append(manifest_row(share["qid"], share["case_name"], CASE_DONE, status="ok" if all_ok else "error"))
+
+
+def case_error_rows(job: Dict, error: str) -> List[Dict]:
+    """process-case error rows for a job that failed as a whole, and for the QIDs sharing its folder."""
+    return [
+        manifest_row(case["qid"], case["case_name"], "process-case", str(job["case_dir"]), "", "error", error)
+        for case in (job, *job.get("shared", ()))
+    ]
+
+
+def conversion_dir(tmp_work_dir: Path, dest_qid_dir: Path, options: ConversionOptions) -> Path:
+    """Where converters write: the QID folder itself with direct placement, else .work/<qid>."""
+    return dest_qid_dir if options.placement == "direct" else tmp_work_dir
+
+
 def process_case_folder(
     case_dir: Path,
     qid: str,
     case_name: str,
     tmp_work_dir: Path,
     dest_qid_dir: Path,
-    manifest: List[Dict],
+    manifest: ManifestSink,
+    options: ConversionOptions = ConversionOptions(),
+    previous: Optional[Dict[str, List[Dict]]] = None,
+    files: Optional[Tuple[List[Path], List[Path]]] = None,
+    shared: Iterable[Dict] = (),
 ) -> None:
     """
     For a given case folder:
       - Convert PDFs -> DOCX
       - Convert all DOCX -> XHTML
       - Copy DOCX + XHTML to dest_qid_dir with safe filenames
+    Rows are recorded as each source file finishes. Source files found in
+    `previous` (from load_resume_state) are not converted again. `files` is the
+    case's (pdfs, docxs) if already known (see InputInventory). `shared` are the
+    other QIDs whose rows resolved to this folder (see share_case_jobs).
     """
-    ensure_dir(tmp_work_dir)
+    out_dir = conversion_dir(tmp_work_dir, dest_qid_dir, options)
+    ensure_dir(out_dir)
     ensure_dir(dest_qid_dir)
 
-    # Gather files
-    pdfs = list(case_dir.rglob("*.pdf"))
-    docxs = list(case_dir.rglob("*.docx"))
-
-    # 1) Convert PDFs -> DOCX
-    generated_docx_paths: List[Path] = []
-    for pdf in pdfs:
-        base = sanitize_filename(pdf.stem)
-        out_docx = tmp_work_dir / f"{base}.docx"
-        ok, err = pdf_to_docx(pdf, out_docx)
-        manifest.append({
-            "qid": qid,
-            "case_name": case_name,
-            "source_file": str(pdf),
-            "action": "pdf->docx",
-            "output_file": str(out_docx) if ok else "",
-            "status": "ok" if ok else "error",
-            "error": err or ""
-        })
-        if ok:
-            generated_docx_paths.append(out_docx)
-
-    # Combine with original docx files
-    all_docx = [*docxs, *generated_docx_paths]
-
-    # 2) Convert all DOCX -> XHTML
-    docx_to_xhtml_map: List[Tuple[Path, Path]] = []
-    for docx in all_docx:
-        base = sanitize_filename(Path(docx).stem)
-        out_xhtml = tmp_work_dir / f"{base}.xhtml"
-        ok, err = docx_to_xhtml(docx, out_xhtml)
-        manifest.append({
-            "qid": qid,
-            "case_name": case_name,
-            "source_file": str(docx),
-            "action": "docx->xhtml",
-            "output_file": str(out_xhtml) if ok else "",
-            "status": "ok" if ok else "error",
-            "error": err or ""
-        })
-        if ok:
-            docx_to_xhtml_map.append((Path(docx), out_xhtml))
-
-    # 3) Copy DOCX + XHTML into QID folder, filenames without spaces
-    #    (We copy original DOCX if it exists, otherwise the generated one)
-    # Build a set of docx paths we want to copy: originals and generated
-    docx_to_copy = set(all_docx)
-    for docx in docx_to_copy:
-        src = Path(docx)
-        base = sanitize_filename(src.stem)
-        dst = dest_qid_dir / f"{base}.docx"
+    pdfs, docxs = files or list_case_files(case_dir)
+    converted: List[List[Dict]] = []
+    for src_idx, src in enumerate([*docxs, *pdfs]):
+        rows = resumed_rows(previous, src)
+        if rows is None:
+            rows = convert_source_file(src, out_dir, options)
+        record_rows(rows, qid, case_name, src_idx, src, manifest)
+        converted.append(rows)
+    finish_case(qid, case_name, converted, dest_qid_dir, manifest, options.place_methods, shared)
+
+
+def resumed_rows(previous: Optional[Dict[str, List[Dict]]], src: Path) -> Optional[List[Dict]]:
+    """Conversion rows from an earlier run that can stand in for converting src, if any."""
+    rows = (previous or {}).get(str(src))
+    if not rows:
+        return None
+    return [{k: v for k, v in dict(r, resumed="yes").items() if not k.startswith("_")} for r in rows]
+
+
+# -------- Parallel execution --------
+
+def _process_case_job(job: Dict) -> List[Dict]:
+    """Process-pool entry point for one case; returns its manifest rows."""
+    rows: List[Dict] = []
+    try:
+        process_case_folder(manifest=rows, **job)
+    except Exception as e:
+        rows.extend(case_error_rows(job, str(e)))
+    return rows
+
+
+def run_cases_parallel(jobs: List[Dict], manifest: ManifestSink, workers: int) -> None:
+    """
+    One pool job per case. A case's rows are recorded when its job completes;
+    compact_manifest restores the deterministic order afterwards.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_process_case_job, job): job for job in jobs}
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="Processing cases"):
+            job = futures[fut]
+            try:
+                rows = fut.result()
+            except Exception as e:
+                # Worker died (e.g. BrokenProcessPool); keep going with the others
+                rows = case_error_rows(job, f"worker failed: {e}")
+            for row in rows:
+                manifest.append(row)
+
+
+def run_files_parallel(jobs: List[Dict], manifest: ManifestSink, workers: int) -> None:
+    """
+    One pool job per source file, across all cases. Rows are recorded as each
+    file completes; copies for a case run in the main process as soon as the
+    last of its files has been converted.
+    """
+    pending: Dict[int, int] = {}
+    converted: Dict[int, List[List[Dict]]] = {}
+
+    def file_done(job_idx: int, src_idx: int, src: Path, rows: List[Dict]) -> None:
+        job = jobs[job_idx]
+        record_rows(rows, job["qid"], job["case_name"], src_idx, src, manifest)
+        converted[job_idx][src_idx] = rows
+        pending[job_idx] -= 1
+        if pending[job_idx] == 0:
+            finish_case(job["qid"], job["case_name"], converted.pop(job_idx),
+                        job["dest_qid_dir"], manifest, job["options"].place_methods, job.get("shared", ()))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for job_idx, job in enumerate(jobs):
+            out_dir = conversion_dir(job["tmp_work_dir"], job["dest_qid_dir"], job["options"])
+            try:
+                ensure_dir(out_dir)
+                pdfs, docxs = job.get("files") or list_case_files(job["case_dir"])
+            except Exception as e:
+                for row in case_error_rows(job, str(e)):
+                    manifest.append(row)
+                continue
+            sources = [*docxs, *pdfs]
+            converted[job_idx] = [[] for _ in sources]
+            pending[job_idx] = len(sources)
+            if not sources:
+                finish_case(job["qid"], job["case_name"], [], job["dest_qid_dir"], manifest,
+                            job["options"].place_methods, job.get("shared", ()))
+            for src_idx, src in enumerate(sources):
+                rows = resumed_rows(job.get("previous"), src)
+                if rows is not None:
+                    file_done(job_idx, src_idx, src, rows)
+                    continue
+                fut = pool.submit(convert_source_file, src, out_dir, job["options"])
+                futures[fut] = (job_idx, src_idx, src)
+
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="Converting files"):
+            job_idx, src_idx, src = futures[fut]
+            try:
+                rows = fut.result()
+            except Exception as e:
+                action = "pdf->docx" if src.suffix.lower() == ".pdf" else "docx->xhtml"
+                rows = [manifest_row("", "", action, str(src), "", "error", f"worker failed: {e}")]
+            file_done(job_idx, src_idx, src, rows)
+
+
+# -------- Staged pipeline --------
+
+@dataclass
+class QueueStats:
+    """Depth samples of one bounded queue between pipeline stages, for tuning the stage pools."""
+    name: str
+    limit: int
+    # Items waiting in the queue (work reserved upstream is not sampled)
+    max_depth: int = 0
+    depth_total: int = 0
+    samples: int = 0
+    # Times the upstream stage had a free worker but the queue was full
+    stalls: int = 0
+
+    def sample(self, depth: int) -> None:
+        self.max_depth = max(self.max_depth, depth)
+        self.depth_total += depth
+        self.samples += 1
+
+    def describe(self) -> str:
+        avg = self.depth_total / self.samples if self.samples else 0.0
+        return f"{self.name}: max {self.max_depth}/{self.limit}, avg {avg:.1f}, upstream stalls {self.stalls}"
+
+
+@dataclass
+class _PipelineCase:
+    job: Dict
+    out_dir: Path
+    rows: Dict[int, List[Dict]] = field(default_factory=dict)
+    # Source indexes whose QID file names collide with another source of the case
+    contended: set = field(default_factory=set)
+    deferred: List[CopyTask] = field(default_factory=list)
+    pending_sources: int = 0
+    pending_copies: int = 0
+    copies_ok: bool = True
+    done: bool = False
+
+
+def _claimed_names(src: Path) -> set:
+    # Output stems placed for src; generated files are named after an already sanitized stem
+    stem = sanitize_filename(src.stem)
+    return {stem, sanitize_filename(stem)}
+
+
+def run_pipeline(
+    jobs: List[Dict],
+    manifest: ManifestSink,
+    pdf_workers: int,
+    xhtml_workers: int,
+    copy_workers: int,
+    queue_depth: int,
+) -> List[QueueStats]:
+    """
+    Run all cases as a three-stage pipeline instead of case by case:
+      pdf pool (pdf->docx / pdf->xhtml) -> xhtml pool (docx->xhtml) -> copy threads
+    A DOCX is converted as soon as it exists and a source file's outputs are
+    copied as soon as they are converted. The pdf->xhtml and xhtml->copy queues
+    hold at most queue_depth source files (counting work still in flight
+    upstream); when one is full, the upstream stage waits.
+
+    Rows and case-done markers are the same as process_case_folder's. Outputs of
+    sources whose QID file names collide are copied when their case completes,
+    in finish_case order, so the same file wins. Returns the queue statistics.
+    """
+    cases: List[_PipelineCase] = []
+    pdf_sources: deque = deque()
+    docx_sources: deque = deque()
+    handoffs: deque = deque()
+    copies: deque = deque()
+    handoff_stats = QueueStats("pdf->xhtml queue", queue_depth)
+    copy_stats = QueueStats("xhtml->copy queue", queue_depth)
+
+    def source_done(case_idx: int, src_idx: int) -> None:
+        case = cases[case_idx]
+        planned = plan_copies(case.rows[src_idx])
+        if src_idx in case.contended:
+            case.deferred.extend(planned)
+        elif planned:
+            copies.append((case_idx, src_idx, planned))
+            case.pending_copies += 1
+        case.pending_sources -= 1
+        maybe_finish(case_idx)
+
+    def maybe_finish(case_idx: int) -> None:
+        case = cases[case_idx]
+        if case.done or case.pending_sources or case.pending_copies:
+            return
+        job = case.job
+        conv_rows = [r for _, rows in sorted(case.rows.items()) for r in rows]
+        conv_ok = all(r["status"] == "ok" for r in conv_rows)
+        all_ok = case.copies_ok and conv_ok
+        deferred = sorted(case.deferred, key=lambda c: (ACTION_ORDER[c[2]], c[1]))
+        for row in place_outputs(job["qid"], job["case_name"], deferred, job["dest_qid_dir"],
+                                 job["options"].place_methods):
+            all_ok = all_ok and row["status"] == "ok"
+            manifest.append(row)
+        manifest.append(manifest_row(job["qid"], job["case_name"], CASE_DONE, status="ok" if all_ok else "error"))
+        place_shared(job["qid"], job.get("shared", ()), plan_copies(conv_rows), conv_ok, manifest,
+                     job["options"].place_methods)
+        case.done = True
+
+    def record(case_idx: int, src_idx: int, src: Path, rows: List[Dict]) -> None:
+        job = cases[case_idx].job
+        record_rows(rows, job["qid"], job["case_name"], src_idx, src, manifest)
+        cases[case_idx].rows.setdefault(src_idx, []).extend(rows)
+
+    # Plan every case up front; resumed source files skip straight to copying
+    for job in jobs:
+        case_idx = len(cases)
+        case = _PipelineCase(job, conversion_dir(job["tmp_work_dir"], job["dest_qid_dir"], job["options"]))
+        cases.append(case)
         try:
-            shutil.copy2(src, dst)
-            manifest.append({
-                "qid": qid,
-                "case_name": case_name,
-                "source_file": str(src),
-                "action": "copy-docx",
-                "output_file": str(dst),
-                "status": "ok",
-                "error": ""
-            })
+            ensure_dir(case.out_dir)
+            ensure_dir(job["dest_qid_dir"])
+            pdfs, docxs = job.get("files") or list_case_files(job["case_dir"])
         except Exception as e:
-            manifest.append({
-                "qid": qid,
-                "case_name": case_name,
-                "source_file": str(src),
-                "action": "copy-docx",
-                "output_file": str(dst),
-                "status": "error",
-                "error": str(e)
-            })
-
-    for _, xhtml in docx_to_xhtml_map:
-        src = Path(xhtml)
-        base = sanitize_filename(src.stem)
-        dst = dest_qid_dir / f"{base}.xhtml"
+            for row in case_error_rows(job, str(e)):
+                manifest.append(row)
+            case.done = True
+            continue
+        sources = [*docxs, *pdfs]
+        owners: Dict[str, List[int]] = {}
+        for src_idx, src in enumerate(sources):
+            for name in _claimed_names(src):
+                owners.setdefault(name, []).append(src_idx)
+        case.contended = {i for idxs in owners.values() if len(idxs) > 1 for i in idxs}
+        case.pending_sources = len(sources)
+        for src_idx, src in enumerate(sources):
+            rows = resumed_rows(job["previous"], src)
+            if rows is not None:
+                record(case_idx, src_idx, src, rows)
+                source_done(case_idx, src_idx)
+            elif src.suffix.lower() == ".pdf":
+                pdf_sources.append((case_idx, src_idx, src))
+            else:
+                docx_sources.append((case_idx, src_idx, src))
+        maybe_finish(case_idx)
+
+    total_sources = sum(c.pending_sources for c in cases)
+    inflight: Dict = {}
+
+    def running(stage: str) -> int:
+        return sum(1 for v in inflight.values() if v[0] == stage)
+
+    with ProcessPoolExecutor(max_workers=pdf_workers) as pdf_pool, \
+            ProcessPoolExecutor(max_workers=xhtml_workers) as xhtml_pool, \
+            ThreadPoolExecutor(max_workers=copy_workers) as copy_pool, \
+            tqdm(total=total_sources, desc="Converting files") as progress:
+        while True:
+            # Feed downstream stages first so queued work drains before new work enters
+            while copies and running("copy") < copy_workers:
+                case_idx, src_idx, planned = copies.popleft()
+                job = cases[case_idx].job
+                fut = copy_pool.submit(place_outputs, job["qid"], job["case_name"], planned,
+                                       job["dest_qid_dir"], job["options"].place_methods)
+                inflight[fut] = ("copy", case_idx, src_idx, planned)
+            while (handoffs or docx_sources) and running("xhtml") < xhtml_workers:
+                if len(copies) + running("xhtml") >= queue_depth:
+                    copy_stats.stalls += 1
+                    break
+                case_idx, src_idx, item = (handoffs or docx_sources).popleft()
+                handoff = item if isinstance(item, dict) else docx_handoff(item)
+                fut = xhtml_pool.submit(convert_xhtml_stage, handoff, cases[case_idx].out_dir,
+                                        cases[case_idx].job["options"])
+                inflight[fut] = ("xhtml", case_idx, src_idx, handoff["src"])
+            while pdf_sources and running("pdf") < pdf_workers:
+                if len(handoffs) + running("pdf") >= queue_depth:
+                    handoff_stats.stalls += 1
+                    break
+                case_idx, src_idx, src = pdf_sources.popleft()
+                fut = pdf_pool.submit(convert_pdf_stage, src, cases[case_idx].out_dir,
+                                      cases[case_idx].job["options"])
+                inflight[fut] = ("pdf", case_idx, src_idx, src)
+            handoff_stats.sample(len(handoffs))
+            copy_stats.sample(len(copies))
+
+            if not inflight:
+                break
+            done, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage, case_idx, src_idx, item = inflight.pop(fut)
+                job = cases[case_idx].job
+                if stage == "copy":
+                    try:
+                        copy_rows = fut.result()
+                    except Exception as e:
+                        copy_rows = [manifest_row(job["qid"], job["case_name"], c[2], str(c[0]), "", "error",
+                                                  f"worker failed: {e}", _src=src_idx) for c in item]
+                    for row in copy_rows:
+                        manifest.append(row)
+                        cases[case_idx].copies_ok &= row["status"] == "ok"
+                    cases[case_idx].pending_copies -= 1
+                    maybe_finish(case_idx)
+                    continue
+                try:
+                    if stage == "pdf":
+                        rows, handoff = fut.result()
+                    else:
+                        rows, handoff = fut.result(), None
+                except Exception as e:
+                    # Worker died (e.g. BrokenProcessPool); keep going with the others
+                    action = "pdf->docx" if stage == "pdf" else "docx->xhtml"
+                    rows, handoff = [manifest_row("", "", action, str(item), "", "error", f"worker failed: {e}")], None
+                record(case_idx, src_idx, item, rows)
+                if handoff is not None:
+                    handoffs.append((case_idx, src_idx, handoff))
+                else:
+                    progress.update(1)
+                    source_done(case_idx, src_idx)
+
+    return [handoff_stats, copy_stats]
+
+
+# -------- Input inventory --------
+
+INVENTORY_VERSION = 1
+# File names list_case_files looks for (case-sensitive, like rglob)
+SOURCE_SUFFIXES = (".pdf", ".docx")
+# A folder modified this close to the previous scan may have changed again within
+# the same mtime tick (coarse on network shares), so it is rescanned
+INVENTORY_RACY_NS = 2_000_000_000
+
+
+class InputInventory:
+    """
+    Persistent listing of input_dir: every folder with its mtime and subfolders,
+    and every PDF/DOCX file with (size, mtime_ns, inode). Built with a single
+    os.scandir walk; refresh() rescans only folders whose mtime changed since
+    the last scan and reuses the stored listing for the rest (one stat each).
+
+    It replaces the per-run iterdir (case matching) and the two rglob walks per
+    case (file discovery), with the same results: top-level symlinks to folders
+    are case folders, but symlinked folders inside a case are not descended.
+    Sizes/mtimes of files in unchanged folders are as of their last scan.
+    """
+
+    def __init__(self, root: Path, path: Optional[Path] = None):
+        self.root = root
+        self.path = path
+        # relative folder ("" = root) -> {"mtime_ns", "subdirs": [names], "links": [names],
+        #                                 "files": {name: [size, mtime_ns, inode]}}
+        self.dirs: Dict[str, Dict] = {}
+        self.scanned_at = 0
+        self.scanned = 0
+        self.reused = 0
+
+    def load(self) -> "InputInventory":
+        """Read the saved inventory, if any and if it was built for the same root."""
         try:
-            shutil.copy2(src, dst)
-            manifest.append({
-                "qid": qid,
-                "case_name": case_name,
-                "source_file": str(src),
-                "action": "copy-xhtml",
-                "output_file": str(dst),
-                "status": "ok",
-                "error": ""
-            })
-        except Exception as e:
-            manifest.append({
-                "qid": qid,
-                "case_name": case_name,
-                "source_file": str(src),
-                "action": "copy-xhtml",
-                "output_file": str(dst),
-                "status": "error",
-                "error": str(e)
-            })
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (AttributeError, OSError, ValueError):
+            return self
+        if data.get("version") == INVENTORY_VERSION and data.get("root") == str(self.root.resolve()):
+            self.dirs = data["dirs"]
+            self.scanned_at = data["scanned_at"]
+        return self
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        data = {
+            "version": INVENTORY_VERSION,
+            "root": str(self.root.resolve()),
+            "scanned_at": self.scanned_at,
+            "dirs": self.dirs,
+        }
+        try:
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def _scan_dir(self, folder: Path, mtime_ns: int) -> Dict:
+        subdirs, links, files = [], [], {}
+        with os.scandir(folder) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                        if entry.is_symlink():
+                            links.append(entry.name)
+                    elif entry.name.endswith(SOURCE_SUFFIXES):
+                        st = entry.stat()
+                        files[entry.name] = [st.st_size, st.st_mtime_ns, entry.inode()]
+                except OSError:
+                    continue  # vanished or broken symlink
+        return {"mtime_ns": mtime_ns, "subdirs": subdirs, "links": links, "files": files}
 
+    def refresh(self) -> "InputInventory":
+        old, new = self.dirs, {}
+        started = time.time_ns()
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            folder = self.root / rel if rel else self.root
+            try:
+                mtime_ns = os.stat(folder).st_mtime_ns
+            except OSError:
+                continue
+            prev = old.get(rel)
+            if prev and prev["mtime_ns"] == mtime_ns and mtime_ns < self.scanned_at - INVENTORY_RACY_NS:
+                entry = prev
+                self.reused += 1
+            else:
+                try:
+                    entry = self._scan_dir(folder, mtime_ns)
+                except OSError:
+                    continue
+                self.scanned += 1
+            new[rel] = entry
+            # Like rglob: symlinked folders are only followed at the top level (case folders)
+            links = set(entry["links"]) if rel else set()
+            stack.extend(f"{rel}/{name}" if rel else name for name in entry["subdirs"] if name not in links)
+        self.dirs, self.scanned_at = new, started
+        return self
+
+    def case_dirs(self) -> List[Path]:
+        """Top-level folders of input_dir, in directory order (as iterdir lists them)."""
+        return [self.root / name for name in self.dirs.get("", {}).get("subdirs", [])]
+
+    def case_files(self, case_dir: Path) -> Tuple[List[Path], List[Path]]:
+        """Same as list_case_files(case_dir), from the inventory."""
+        try:
+            rel = case_dir.relative_to(self.root).as_posix()
+        except ValueError:
+            return list_case_files(case_dir)
+        if rel not in self.dirs:
+            return list_case_files(case_dir)
+        pdfs: List[Path] = []
+        docxs: List[Path] = []
+        stack = [rel]
+        while stack:
+            d = stack.pop()
+            entry = self.dirs.get(d)
+            if entry is None:
+                continue
+            folder = self.root / d
+            for name in entry["files"]:
+                (pdfs if name.endswith(".pdf") else docxs).append(folder / name)
+            links = set(entry["links"])
+            stack.extend(f"{d}/{name}" for name in entry["subdirs"] if name not in links)
+        return sorted(pdfs), sorted(docxs)
 
-def find_case_dir_for_name(case_name: str, input_dir: Path, subdir_map: Dict[str, Path]) -> Optional[Path]:
+
+# -------- Watch mode --------
+
+# inotify(7) event bits used here
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+class Inotify:
+    """
+    Minimal ctypes binding of Linux inotify. Watches directory trees and
+    reports the paths of files written (closed after writing) or moved in;
+    new subdirectories are watched as they appear.
+    """
+
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, Path] = {}
+
+    def add_tree(self, root: Path) -> List[Path]:
+        """Watch root and its subfolders; returns the files already in them (for moved-in folders)."""
+        found: List[Path] = []
+        for dirpath, _, filenames in os.walk(root):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(dirpath), self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                raise OSError(err, f"inotify_add_watch failed: {os.strerror(err)}", dirpath)
+            self.dirs[wd] = Path(dirpath)
+            found.extend(Path(dirpath) / f for f in filenames)
+        return found
+
+    def read(self, timeout: float) -> Tuple[List[Path], bool]:
+        """Wait up to timeout seconds; returns (changed file paths, overflowed)."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return [], False
+        buf = os.read(self.fd, 256 * 1024)
+        changed: List[Path] = []
+        overflow = False
+        pos = 0
+        while pos < len(buf):
+            wd, mask, _, name_len = _INOTIFY_EVENT.unpack_from(buf, pos)
+            name = buf[pos + _INOTIFY_EVENT.size:pos + _INOTIFY_EVENT.size + name_len].rstrip(b"\0")
+            pos += _INOTIFY_EVENT.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = parent / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        changed.extend(self.add_tree(path))
+                    except OSError:
+                        pass  # removed again before we got to it
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                changed.append(path)
+        return changed, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _file_state(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def snapshot_sources(case_dirs: List[Path]) -> Dict[Path, Tuple[int, int]]:
+    """(size, mtime) of every convertible file under case_dirs, as list_case_files would find them."""
+    states: Dict[Path, Tuple[int, int]] = {}
+    for case_dir in case_dirs:
+        for path in [p for pdfs_docxs in list_case_files(case_dir) for p in pdfs_docxs]:
+            state = _file_state(path)
+            if state:
+                states[path] = state
+    return states
+
+
+def watch_cases(
+    watch_jobs: List[Dict],
+    manifest_log: Path,
+    run_batch: Callable[[List[Dict], ManifestWriter], None],
+    on_batch: Callable[[], None],
+    debounce: float = 2.0,
+) -> None:
+    """
+    Watch the folders of watch_jobs (matched cases) and convert PDF/DOCX files
+    that are added or modified, until interrupted (Ctrl-C).
+
+    A file is converted once its size and mtime have been stable for `debounce`
+    seconds, so partially written files are not picked up. Each batch of
+    changes re-runs the affected cases with --resume semantics, minus the
+    changed files: only those are converted, the other outputs are re-placed.
+    Each batch is a new manifest run, so its rows supersede the case's previous
+    rows on compaction; on_batch() is called after each one (e.g. to rewrite
+    manifest.csv). Deleted files are not handled.
+    """
+    jobs_by_dir: Dict[Path, List[Dict]] = {}
+    for job in watch_jobs:
+        jobs_by_dir.setdefault(job["case_dir"], []).append(job)
+
+    inotify = Inotify()
+    try:
+        for case_dir in jobs_by_dir:
+            inotify.add_tree(case_dir)
+        # Taken after the watches are in place, so nothing written in between is missed
+        known = snapshot_sources(list(jobs_by_dir))
+        pending: Dict[Path, Tuple[float, Optional[Tuple[int, int]]]] = {}
+        print(f"\nWatching {len(jobs_by_dir)} case folders for new or modified PDF/DOCX files (Ctrl-C to stop)...")
+
+        while True:
+            changed, overflow = inotify.read(timeout=min(1.0, debounce / 2) if pending else 60.0)
+            if overflow:
+                # Events were lost: fall back to comparing every file with the snapshot
+                changed.extend(snapshot_sources(list(jobs_by_dir)))
+            now = time.monotonic()
+            for path in changed:
+                if path.name.endswith(SOURCE_SUFFIXES):
+                    pending[path] = (now, _file_state(path))
+
+            # Debounce: a file is ready once its state has not moved for `debounce` seconds
+            ready: List[Path] = []
+            for path, (since, state) in list(pending.items()):
+                current = _file_state(path)
+                if current != state:
+                    pending[path] = (now, current)
+                elif now - since >= debounce:
+                    del pending[path]
+                    if current is not None and known.get(path) != current:
+                        known[path] = current
+                        ready.append(path)
+            if not ready:
+                continue
+
+            by_dir: Dict[Path, List[Path]] = {}
+            for path in ready:
+                case_dir = next((d for d in path.parents if d in jobs_by_dir), None)
+                if case_dir is not None:
+                    by_dir.setdefault(case_dir, []).append(path)
+            _, reusable = load_resume_state(manifest_log)
+            batch: List[Dict] = []
+            for case_dir, paths in by_dir.items():
+                for job in jobs_by_dir[case_dir]:
+                    previous = dict(reusable.get((job["qid"], job["case_name"]), {}))
+                    for path in paths:
+                        previous.pop(str(path), None)
+                    # Files changed since the batch: list them again
+                    batch.append(dict(job, previous=previous, files=None))
+            with ManifestWriter(manifest_log, append=True) as manifest_writer:
+                run_batch(batch, manifest_writer)
+            print(f"[watch {time.strftime('%H:%M:%S')}] {len(ready)} changed files, "
+                  f"{len(batch)} cases updated")
+            on_batch()
+    except KeyboardInterrupt:
+        print("\nWatch stopped.")
+    finally:
+        inotify.close()
+
+
+# -------- Case folder matching --------
+
+# Fuzzy matches need at least this similarity (difflib ratio of normalized names)
+MATCH_FUZZY_MIN_SCORE = 0.85
+# Trigram-ranked folders re-scored with difflib per fuzzy lookup
+MATCH_FUZZY_CANDIDATES = 20
+# Candidate folder names listed in the manifest
+MATCH_REPORT_CANDIDATES = 5
+
+
+@dataclass(frozen=True)
+class CaseMatch:
+    """Result of a case folder lookup; path is None when nothing (unambiguous) matched."""
+    path: Optional[Path]
+    match: str = ""          # exact | normalized | substring | fuzzy | "" (not found)
+    score: float = 0.0       # 1.0 for exact/normalized; coverage or similarity otherwise
+    candidates: Tuple[str, ...] = ()
+
+    def manifest_fields(self) -> Dict:
+        return {
+            "match": self.match,
+            "match_score": f"{self.score:.2f}" if self.match else "",
+            "match_candidates": "; ".join(self.candidates[:MATCH_REPORT_CANDIDATES]),
+        }
+
+
+def _trigrams(key: str) -> List[str]:
+    return [key[i:i + 3] for i in range(len(key) - 2)]
+
+
+class CaseFolderIndex:
     """
-    Try exact match first; then normalized match; then loose contains match.
+    Lookup of case folders by "Name of Case", built once per run over the
+    norm_key of every subfolder of input_dir:
+      - exact folder name, then normalized name (dict lookups)
+      - substring: folders whose normalized name contains the query, found by
+        intersecting trigram posting lists instead of scanning every folder
+      - fuzzy: folders ranked by shared trigrams, re-scored with difflib, so
+        near-miss typos still match
+
+    Substring ties keep the old preference for the shortest name but are reported
+    as candidates; fuzzy ties are not guessed at.
     """
-    # Exact (case-sensitive)
-    exact = input_dir / case_name
-    if exact.is_dir():
-        return exact
 
-    # Case-insensitive normalized match
-    nk = norm_key(case_name)
-    if nk in subdir_map:
-        return subdir_map[nk]
+    def __init__(self, root: Path, subdirs: Optional[List[Path]] = None):
+        self.root = root
+        self.by_key = map_subdirs_by_norm(root, subdirs)
+        # Exact names known up front (from an inventory) spare a stat per lookup
+        self.names = {p.name for p in subdirs} if subdirs is not None else None
+        self.keys = list(self.by_key)
+        # Boundary-padded trigrams; unpadded query trigrams are a subset of these
+        self.postings: Dict[str, List[int]] = {}
+        for i, k in enumerate(self.keys):
+            for g in set(_trigrams(f"^{k}$")):
+                self.postings.setdefault(g, []).append(i)
+
+    def _names(self, ids: List[int]) -> Tuple[str, ...]:
+        return tuple(self.by_key[self.keys[i]].name for i in ids)
 
-    # Loose: look for any folder whose normalized name contains the normalized query
-    candidates = [p for k, p in subdir_map.items() if nk in k]
-    if len(candidates) == 1:
-        return candidates[0]
-    elif len(candidates) > 1:
-        # If ambiguous, prefer the shortest name (often the “main” folder)
-        candidates.sort(key=lambda p: len(p.name))
-        return candidates[0]
+    def _substring(self, nk: str) -> List[int]:
+        grams = set(_trigrams(nk))
+        if not grams:
+            return [i for i, k in enumerate(self.keys) if nk in k]
+        lists = sorted((self.postings.get(g, []) for g in grams), key=len)
+        ids = set(lists[0])
+        for lst in lists[1:]:
+            ids.intersection_update(lst)
+            if not ids:
+                break
+        return [i for i in ids if nk in self.keys[i]]
 
-    return None
+    def _fuzzy(self, nk: str) -> List[Tuple[float, int]]:
+        grams = set(_trigrams(f"^{nk}$"))
+        shared: Dict[int, int] = {}
+        for g in grams:
+            for i in self.postings.get(g, ()):
+                shared[i] = shared.get(i, 0) + 1
+        # Dice coefficient over trigram sets as the cheap first pass
+        ranked = sorted(
+            shared,
+            key=lambda i: -2 * shared[i] / (len(grams) + len(self.keys[i]))
+        )[:MATCH_FUZZY_CANDIDATES]
+        scored = [(difflib.SequenceMatcher(None, nk, self.keys[i]).ratio(), i) for i in ranked]
+        scored.sort(key=lambda t: (-t[0], len(self.keys[t[1]]), self.keys[t[1]]))
+        return scored
+
+    def match(self, case_name: str) -> CaseMatch:
+        # Exact (case-sensitive)
+        exact = self.root / case_name
+        if self.names is not None and "/" not in case_name:
+            is_exact = case_name in self.names
+        else:
+            is_exact = exact.is_dir()
+        if is_exact:
+            return CaseMatch(exact, "exact", 1.0)
+
+        # Case-insensitive normalized match
+        nk = norm_key(case_name)
+        if nk in self.by_key:
+            return CaseMatch(self.by_key[nk], "normalized", 1.0)
+        if not nk:
+            return CaseMatch(None)
+
+        # Loose: folders whose normalized name contains the normalized query
+        ids = self._substring(nk)
+        if ids:
+            # If ambiguous, prefer the shortest name (often the “main” folder)
+            ids.sort(key=lambda i: (len(self.by_key[self.keys[i]].name), self.keys[i]))
+            best = self.keys[ids[0]]
+            return CaseMatch(
+                self.by_key[best], "substring", len(nk) / len(best),
+                self._names(ids) if len(ids) > 1 else (),
+            )
+
+        # Fuzzy: tolerate typos in the Excel or folder name
+        scored = [(r, i) for r, i in self._fuzzy(nk) if r >= MATCH_FUZZY_MIN_SCORE]
+        if not scored:
+            return CaseMatch(None)
+        top = [i for r, i in scored if r == scored[0][0]]
+        names = self._names([i for _, i in scored])
+        if len(top) > 1:
+            return CaseMatch(None, "fuzzy", scored[0][0], names)
+        return CaseMatch(self.by_key[self.keys[top[0]]], "fuzzy", scored[0][0], names if len(names) > 1 else ())
 
 
 def load_excel(excel_path: Path, sheet_name: Optional[str]) -> pd.DataFrame:
@@ -337,18 +2618,112 @@ def load_excel(excel_path: Path, sheet_name: Optional[str]) -> pd.DataFrame:
     return out
 
 
+def stage_pool_sizes(args: argparse.Namespace, workers: int) -> Tuple[int, int, int, int]:
+    """(pdf workers, xhtml workers, copy workers, queue depth) for --parallel-unit stage."""
+    pdf_workers = max(1, args.pdf_workers or (workers + 1) // 2)
+    xhtml_workers = max(1, args.xhtml_workers or workers // 2)
+    queue_depth = max(1, args.queue_depth or 2 * max(pdf_workers, xhtml_workers))
+    return pdf_workers, xhtml_workers, max(1, args.copy_workers), queue_depth
+
+
+def run_jobs(jobs: List[Dict], manifest: ManifestSink, args: argparse.Namespace, workers: int) -> List[QueueStats]:
+    """
+    Run case jobs in the execution mode chosen on the command line, each case
+    folder converted once (share_case_jobs); returns pipeline queue stats, if any.
+    """
+    jobs = share_case_jobs(jobs)
+    if args.parallel_unit == "stage":
+        return run_pipeline(jobs, manifest, *stage_pool_sizes(args, workers))
+    if workers == 1:
+        for job in tqdm(jobs, desc="Processing rows"):
+            process_case_folder(manifest=manifest, **job)
+    elif args.parallel_unit == "file":
+        run_files_parallel(jobs, manifest, workers)
+    else:
+        run_cases_parallel(jobs, manifest, workers)
+    return []
+
+
 def main():
     parser = argparse.ArgumentParser(description="Process case folders from Excel.")
     parser.add_argument("--excel", required=True, type=Path, help="Path to input .xlsx")
     parser.add_argument("--input-dir", required=True, type=Path, help="Path to input_dir containing case folders")
     parser.add_argument("--output-dir", required=True, type=Path, help="Path to output_dir")
     parser.add_argument("--sheet-name", default=None, help="Excel sheet name (optional)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes for conversions (default: 1, no pool)")
+    parser.add_argument("--parallel-unit", choices=["case", "file", "stage"], default="case",
+                        help="With --workers > 1: spread whole cases or individual files across the pool; "
+                             "stage: pipeline with separate pdf / xhtml / copy pools (any --workers)")
+    parser.add_argument("--pdf-workers", type=int, default=None,
+                        help="Stage pipeline: pdf->docx processes (default: half of --workers, rounded up)")
+    parser.add_argument("--xhtml-workers", type=int, default=None,
+                        help="Stage pipeline: docx->xhtml processes (default: half of --workers, at least 1)")
+    parser.add_argument("--copy-workers", type=int, default=2,
+                        help="Stage pipeline: copy threads")
+    parser.add_argument("--queue-depth", type=int, default=None,
+                        help="Stage pipeline: max items waiting between stages (default: 2x the larger pool)")
+    parser.add_argument("--cache-dir", type=Path, default=None,
+                        help="Conversion cache location (default: output_dir/.cache)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always reconvert, ignoring and not populating the cache")
+    parser.add_argument("--split-pages", type=int, default=0,
+                        help="Convert PDFs with at least this many pages as parallel page ranges (default: 0 = never)")
+    parser.add_argument("--split-workers", type=int, default=4,
+                        help="Worker processes per split PDF (default: 4)")
+    parser.add_argument("--max-rss-mb", type=int, default=0,
+                        help="Run each conversion in a supervised worker subprocess and kill it when the "
+                             "RSS of its process tree exceeds this many MB (status oom; Linux; 0 = no limit)")
+    parser.add_argument("--timeout", type=float, default=0,
+                        help="Run each conversion in a supervised worker subprocess and kill it after "
+                             "this many seconds (status timeout; 0 = no limit)")
+    parser.add_argument("--fast-path", action="store_true",
+                        help="Triage PDFs; convert simple text-layer ones directly to XHTML (no DOCX output)")
+    parser.add_argument("--layout", choices=list(LAYOUTS), default="flat",
+                        help="flat: output_dir/QID_<id>; sharded: output_dir/ab/cd/QID_<id> (hash prefix). "
+                             "QIDs already in output_dir/qid_index.json keep their folder")
+    parser.add_argument("--placement", choices=["copy", "direct"], default="copy",
+                        help="copy: convert under .work then copy; direct: convert into QID folders "
+                             "and reflink/hardlink source DOCX and cache hits (copy fallback)")
+    parser.add_argument("--images", choices=["inline", "extract"], default="inline",
+                        help="inline: base64 data URIs in the XHTML; extract: content-addressed files "
+                             "in an assets/ folder next to the XHTML")
+    parser.add_argument("--xhtml-writer", choices=["tree", "stream"], default="tree",
+                        help="tree: serialize each XHTML in one go; stream: write it incrementally with "
+                             "etree.xmlfile (lower peak memory on large documents)")
+    parser.add_argument("--compact-xhtml", action="store_true",
+                        help="Write XHTML without pretty-print indentation")
+    parser.add_argument("--docx-engine", choices=["mammoth", "native"], default="mammoth",
+                        help="mammoth: DOCX->XHTML with mammoth; native: stream word/document.xml block by "
+                             "block (docx_stream.py), falling back to mammoth for content it does not handle")
+    parser.add_argument("--docx-handoff", choices=["disk", "memory"], default="disk",
+                        help="disk: docx->xhtml reads the DOCX generated from a PDF back from disk; memory: "
+                             "pdf->docx hands its bytes over directly (the DOCX file is still written once)")
+    parser.add_argument("--no-pdf-docx", action="store_true",
+                        help="Don't write or copy DOCX generated from PDFs (implies --docx-handoff memory; "
+                             "the cache still keeps them)")
+    parser.add_argument("--report-slowest", type=int, default=10,
+                        help="How many of the slowest conversions to list in the end-of-run report (0 = none)")
+    parser.add_argument("--inventory", type=Path, default=None,
+                        help="Saved listing of input_dir, refreshed by folder mtime (default: output_dir/inventory.json)")
+    parser.add_argument("--no-inventory", action="store_true",
+                        help="List input_dir from scratch with iterdir/rglob instead of the inventory")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from output_dir/manifest.jsonl, skipping cases and files already done")
+    parser.add_argument("--watch", action="store_true",
+                        help="After the batch, keep running and convert PDF/DOCX files added to or modified "
+                             "in matched case folders (Linux inotify)")
+    parser.add_argument("--watch-debounce", type=float, default=2.0,
+                        help="Seconds a file must stay unchanged before --watch converts it (default: 2)")
     args = parser.parse_args()
+    if args.watch and not sys.platform.startswith("linux"):
+        parser.error("--watch needs Linux (inotify)")
 
     excel_path: Path = args.excel
     input_dir: Path = args.input_dir
     output_dir: Path = args.output_dir
     sheet_name: Optional[str] = args.sheet_name
+    workers: int = max(1, args.workers)
 
     if not excel_path.exists():
         raise FileNotFoundError(f"Excel not found: {excel_path}")
@@ -361,55 +2736,150 @@ def main():
     work_dir = output_dir / ".work"
     ensure_dir(work_dir)
 
+    # content-hash conversion cache, shared across runs and QIDs
+    cache: Optional[ConversionCache] = None
+    if not args.no_cache:
+        cache = ConversionCache(args.cache_dir or output_dir / ".cache")
+    sandbox: Optional[SandboxLimits] = None
+    if args.max_rss_mb > 0 or args.timeout > 0:
+        sandbox = SandboxLimits(max_rss_mb=max(0, args.max_rss_mb), timeout_s=max(0.0, args.timeout))
+    options = ConversionOptions(
+        cache=cache,
+        sandbox=sandbox,
+        split_pages=max(0, args.split_pages),
+        split_workers=max(1, args.split_workers),
+        fast_path=args.fast_path,
+        placement=args.placement,
+        images=args.images,
+        xhtml_writer=args.xhtml_writer,
+        compact_xhtml=args.compact_xhtml,
+        docx_handoff=args.docx_handoff,
+        docx_engine=args.docx_engine,
+        keep_pdf_docx=not args.no_pdf_docx,
+    )
+
     df = load_excel(excel_path, sheet_name)
 
-    # Pre-map subdirectories for faster lookups
-    subdir_map = map_subdirs_by_norm(input_dir)
+    # One scandir walk (or an incremental refresh of the saved inventory) lists
+    # case folders and their files for matching and discovery
+    inventory: Optional[InputInventory] = None
+    if not args.no_inventory:
+        t0 = time.perf_counter()
+        inventory = InputInventory(input_dir, args.inventory or output_dir / "inventory.json").load().refresh()
+        inventory.save()
+        print(f"Inventory: {inventory.scanned} folders scanned, {inventory.reused} unchanged "
+              f"({time.perf_counter() - t0:.1f}s)")
 
-    manifest: List[Dict] = []
+    # Index subdirectories once for fast exact/substring/fuzzy lookups
+    folder_index = CaseFolderIndex(input_dir, inventory.case_dirs() if inventory else None)
+
+    # Rows are streamed to manifest.jsonl as actions finish; manifest.csv is
+    # compacted from it at the end, in Excel row order.
+    manifest_log = output_dir / "manifest.jsonl"
+    # QID -> output folder; new QIDs are placed in the chosen layout
+    qid_index = QidIndex.load(output_dir, args.layout)
+    completed: set = set()
+    previous: Dict[CaseKey, Dict[str, List[Dict]]] = {}
+    if args.resume:
+        completed, previous = load_resume_state(manifest_log)
+
+    case_order: Dict[CaseKey, int] = {}
+    jobs: List[Dict] = []
+    watch_jobs: List[Dict] = []  # every matched case, including those skipped by --resume
     missing_cases: List[Tuple[str, str]] = []
+    skipped = 0
+    queue_stats: List[QueueStats] = []
 
-    for _, row in tqdm(df.iterrows(), total=len(df), desc="Processing rows"):
-        qid = str(row["QID"]).strip()
-        case_name = str(row["Name of Case"]).strip()
+    with ManifestWriter(manifest_log, append=args.resume) as manifest_writer:
+        for idx, (_, row) in enumerate(df.iterrows()):
+            qid = str(row["QID"]).strip()
+            case_name = str(row["Name of Case"]).strip()
+            case_order.setdefault((qid, case_name), idx)
 
-        case_dir = find_case_dir_for_name(case_name, input_dir, subdir_map)
-        if not case_dir:
-            manifest.append({
+            found = folder_index.match(case_name)
+            case_dir = found.path
+            if not case_dir:
+                error = "Ambiguous case folder" if found.candidates else "Case folder not found"
+                manifest_writer.append(manifest_row(
+                    qid, case_name, "find-case-folder", status="error", error=error,
+                    **found.manifest_fields()
+                ))
+                missing_cases.append((qid, case_name))
+                continue
+
+            job = {
+                "case_dir": case_dir,
                 "qid": qid,
                 "case_name": case_name,
-                "source_file": "",
-                "action": "find-case-folder",
-                "output_file": "",
-                "status": "error",
-                "error": "Case folder not found"
-            })
-            missing_cases.append((qid, case_name))
-            continue
+                "tmp_work_dir": work_dir / layout_path(sanitize_filename(qid), args.layout),
+                # QID destination folder
+                "dest_qid_dir": qid_index.folder(qid, f"QID_{sanitize_filename(qid)}"),
+                "options": options,
+                "previous": previous.get((qid, case_name)),
+                "files": inventory.case_files(case_dir) if inventory else None,
+            }
+            watch_jobs.append(job)
 
-        # QID destination folder
-        dest_qid_dir = output_dir / f"QID_{sanitize_filename(qid)}"
-        tmp_work_dir = work_dir / f"{sanitize_filename(qid)}"
-        process_case_folder(
-            case_dir=case_dir,
-            qid=qid,
-            case_name=case_name,
-            tmp_work_dir=tmp_work_dir,
-            dest_qid_dir=dest_qid_dir,
-            manifest=manifest
-        )
+            if (qid, case_name) in completed:
+                skipped += 1
+                continue
+
+            # Only loose matches are worth a manifest row for review
+            if found.match in ("substring", "fuzzy"):
+                manifest_writer.append(manifest_row(
+                    qid, case_name, "find-case-folder", source_file=str(case_dir),
+                    **found.manifest_fields()
+                ))
+
+            jobs.append(job)
+
+        # Saved before converting, so the index covers every folder this run may create
+        qid_index.save()
+        queue_stats = run_jobs(jobs, manifest_writer, args, workers)
 
+    manifest = compact_manifest(manifest_log, case_order)
     write_manifest(manifest, output_dir)
 
+    if args.watch:
+        def rewrite_manifest() -> None:
+            write_manifest(compact_manifest(manifest_log, case_order), output_dir)
+
+        watch_cases(
+            watch_jobs, manifest_log,
+            lambda batch, writer: run_jobs(batch, writer, args, workers),
+            rewrite_manifest, max(0.1, args.watch_debounce),
+        )
+        manifest = compact_manifest(manifest_log, case_order)
+
     # Helpful console summary
     print("\nDone.")
     print(f"Output written under: {output_dir}")
-    print(f"Manifest: {output_dir / 'manifest.csv'}")
+    print(f"Manifest: {output_dir / 'manifest.csv'} (log: {manifest_log})")
+    shared = {(r["qid"], r["case_name"]) for r in manifest if r.get("shared_from")}
+    if shared:
+        print(f"Shared case folders: {len(shared)} rows reused another row's conversions (shared_from)")
+    print(f"QID index: {qid_index.path} ({len(qid_index.qids)} QIDs, new ones {args.layout})")
+    if args.resume:
+        print(f"Resume: skipped {skipped} completed cases")
+    if cache is not None:
+        hits = sum(1 for r in manifest if r.get("cache") == "hit")
+        misses = sum(1 for r in manifest if r.get("cache") == "miss")
+        print(f"Cache: {hits} hits, {misses} misses ({cache.root})")
+    if args.images == "extract":
+        images = sum(int(r.get("images") or 0) for r in manifest)
+        saved = sum(int(r.get("image_bytes_saved") or 0) for r in manifest)
+        print(f"Images: {images} extracted, {saved / 1e6:.1f} MB saved vs inline data URIs")
+    print_metrics_report(manifest, manifest_writer.run_id, args.report_slowest)
+    if queue_stats:
+        pdf_workers, xhtml_workers, copy_workers, _ = stage_pool_sizes(args, workers)
+        print(f"\nPipeline queues (pdf={pdf_workers}, xhtml={xhtml_workers}, copy={copy_workers} workers):")
+        for stats in queue_stats:
+            print(f"  {stats.describe()}")
     if missing_cases:
         print("\nCases with no matching folder in input_dir:")
         for qid, name in missing_cases:
             print(f"  - QID {qid}: '{name}'")
-        print("Tip: Check for spelling/case/space/underscore differences. The matcher tolerates spaces/underscores/hyphens and is case-insensitive.")
+        print("Tip: Check for spelling/case/space/underscore differences. The matcher tolerates spaces/underscores/hyphens and small typos, and is case-insensitive; see match_candidates in the manifest for ambiguous names.")
 
 if __name__ == "__main__":
     main()